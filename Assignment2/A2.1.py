@@ -1,139 +1,209 @@
-def encryptFile(shift1, shift2):
-    try:
-        inputFile = open("raw_text.txt", "r")
-    except:
-        print("raw_text.txt file not found.")
-        return
+import argparse
+import os
+import sys
+
+from cipher_engine import (CipherTables, CHUNK_SIZE, encryptStream,
+                           decryptStream, compareStreams, roundTripCheck)
+from cipher_parallel import (parallelEncryptStream, parallelDecryptStream,
+                             processTree)
+from cipher_analysis import tallyCiphertext, rankKeys
+from cipher_format import (encryptCompact, decryptCompact, legacyToCompact,
+                           compactToLegacy)
+
 
-    outputFile = open("encrypted_text.txt", "w")
+# "-" means stdin/stdout so the script can sit in a pipe
+def openInput(path):
+    if path == "-":
+        return sys.stdin
+    return open(path, "r")
 
-    for line in inputFile:
-        encryptedLine = ""
 
-        for ch in line:
+def openOutput(path):
+    if path == "-":
+        return sys.stdout
+    return open(path, "w")
 
-            # lowercase letters
-            if 'a' <= ch <= 'z':
-                if ch <= 'm':      # rule 1
-                    newPos = ord(ch) + (shift1 * shift2)
-                    rule = "1"
-                else:              # rule 2
-                    newPos = ord(ch) - (shift1 + shift2)
-                    rule = "2"
 
-                while newPos > ord('z'):
-                    newPos -= 26
-                while newPos < ord('a'):
-                    newPos += 26
+# binary versions for the compact format
+def openBinaryInput(path):
+    if path == "-":
+        return sys.stdin.buffer
+    return open(path, "rb")
 
-                encryptedLine += rule + chr(newPos)
 
-            # uppercase letters
-            elif 'A' <= ch <= 'Z':
-                if ch <= 'M':      # rule 3
-                    newPos = ord(ch) - shift1
-                    rule = "3"
-                else:              # rule 4
-                    newPos = ord(ch) + (shift2 * shift2)
-                    rule = "4"
+def openBinaryOutput(path):
+    if path == "-":
+        return sys.stdout.buffer
+    return open(path, "wb")
 
-                while newPos > ord('Z'):
-                    newPos -= 26
-                while newPos < ord('A'):
-                    newPos += 26
 
-                encryptedLine += rule + chr(newPos)
+def closeFile(f):
+    if f is sys.stdout or f is getattr(sys.stdout, "buffer", None):
+        f.flush()
+    elif f is not sys.stdin and f is not getattr(sys.stdin, "buffer", None):
+        f.close()
+
+
+def encryptFile(shift1, shift2, inputPath="raw_text.txt",
+                outputPath="encrypted_text.txt", chunkSize=CHUNK_SIZE, workers=1):
+    try:
+        inputFile = openInput(inputPath)
+    except:
+        print(f"{inputPath} file not found.", file=sys.stderr)
+        return False
 
-            else:
-                encryptedLine += ch
+    outputFile = openOutput(outputPath)
 
-        outputFile.write(encryptedLine)
+    if workers > 1:
+        parallelEncryptStream(inputFile, outputFile, shift1, shift2, workers, chunkSize)
+    else:
+        encryptStream(inputFile, outputFile, CipherTables(shift1, shift2), chunkSize)
 
-    inputFile.close()
-    outputFile.close()
+    closeFile(inputFile)
+    closeFile(outputFile)
+    return True
 
 
-def decryptFile(shift1, shift2):
+def decryptFile(shift1, shift2, inputPath="encrypted_text.txt",
+                outputPath="decrypted_text.txt", chunkSize=CHUNK_SIZE, workers=1):
     try:
-        inputFile = open("encrypted_text.txt", "r")
+        inputFile = openInput(inputPath)
     except:
-        print("encrypted_text.txt file not found.")
-        return
+        print(f"{inputPath} file not found.", file=sys.stderr)
+        return False
 
-    outputFile = open("decrypted_text.txt", "w")
+    outputFile = openOutput(outputPath)
 
-    for line in inputFile:
-        decryptedLine = ""
-        i = 0
+    if workers > 1:
+        complete = parallelDecryptStream(inputFile, outputFile, shift1, shift2,
+                                         workers, chunkSize)
+    else:
+        complete = decryptStream(inputFile, outputFile,
+                                 CipherTables(shift1, shift2), chunkSize)
 
-        while i < len(line):
-            ch = line[i]
+    closeFile(inputFile)
+    closeFile(outputFile)
 
-            if ch in "1234":
+    # basic safety check
+    if not complete:
+        print("Encrypted file format error.", file=sys.stderr)
+        return False
+    return True
 
-                # basic safety check
-                if i + 1 >= len(line):
-                    print("Encrypted file format error.")
-                    return
+# Verification function
+def verifyDecryption(originalPath="raw_text.txt",
+                     decryptedPath="decrypted_text.txt", chunkSize=CHUNK_SIZE):
+    try:
+        file1 = openInput(originalPath)
+        file2 = openInput(decryptedPath)
+    except OSError as e:
+        print(f"Could not open file: {e.filename}", file=sys.stderr)
+        return False
 
-                letter = line[i + 1]
+    # compare chunk by chunk so neither file is held in memory
+    mismatch = compareStreams(file1, file2, chunkSize)
 
-                if ch == "1":
-                    orig = ord(letter) - (shift1 * shift2)
-                    while orig < ord('a'):
-                        orig += 26
-                    decryptedLine += chr(orig)
+    closeFile(file1)
+    closeFile(file2)
 
-                elif ch == "2":
-                    orig = ord(letter) + (shift1 + shift2)
-                    while orig > ord('z'):
-                        orig -= 26
-                    decryptedLine += chr(orig)
+    if mismatch is None:
+        print("Decryption successful. Files match.")
+        return True
 
-                elif ch == "3":
-                    orig = ord(letter) + shift1
-                    while orig > ord('Z'):
-                        orig -= 26
-                    decryptedLine += chr(orig)
+    print(f"Decryption failed. Files do not match (first difference at character {mismatch}).")
+    return False
 
-                elif ch == "4":
-                    orig = ord(letter) - (shift2 * shift2)
-                    while orig < ord('A'):
-                        orig += 26
-                    decryptedLine += chr(orig)
 
-                i += 2
-            else:
-                decryptedLine += ch
-                i += 1
+# encrypt -> decrypt -> compare in memory, nothing is written unless
+# paths are given for the intermediate files
+def checkRoundTrip(shift1, shift2, inputPath="raw_text.txt", encryptedPath=None,
+                   decryptedPath=None, chunkSize=CHUNK_SIZE):
+    try:
+        inputFile = openInput(inputPath)
+    except OSError:
+        print(f"{inputPath} file not found.", file=sys.stderr)
+        return False
 
-        outputFile.write(decryptedLine)
+    encryptedFile = openOutput(encryptedPath) if encryptedPath else None
+    decryptedFile = openOutput(decryptedPath) if decryptedPath else None
 
-    inputFile.close()
-    outputFile.close()
+    mismatch = roundTripCheck(inputFile, CipherTables(shift1, shift2), chunkSize,
+                              encryptedFile, decryptedFile)
 
-# Verification function
-def verifyDecryption():
-    file1 = open("raw_text.txt", "r")
-    file2 = open("decrypted_text.txt", "r")
+    for f in [inputFile, encryptedFile, decryptedFile]:
+        if f is not None:
+            closeFile(f)
 
-    originalText = file1.read()
-    decryptedText = file2.read()
+    if mismatch is None:
+        print("Round trip successful. Text matches.")
+        return True
 
-    file1.close()
-    file2.close()
+    print(f"Round trip failed at character {mismatch}.")
+    return False
 
-    if originalText == decryptedText:
-        print("Decryption successful. Files match.")
-    else:
-        print("Decryption failed. Files do not match.")
 
-shift1Input = input("Enter shift1 value: ")
-shift2Input = input("Enter shift2 value: ")
+# guess the key pair from legacy ciphertext alone
+def recoverKeys(inputPath="encrypted_text.txt", maxShift=100, top=5, chunkSize=CHUNK_SIZE):
+    try:
+        inputFile = openInput(inputPath)
+    except OSError:
+        print(f"{inputPath} file not found.", file=sys.stderr)
+        return False
+
+    histogram = tallyCiphertext(inputFile, chunkSize)
+    closeFile(inputFile)
+
+    if histogram.sum() == 0:
+        print("No encrypted letters found.", file=sys.stderr)
+        return False
+
+    shifts = range(1, maxShift + 1)
+    for rank, key in enumerate(rankKeys(histogram, shifts, shifts, top), start=1):
+        print(f"{rank}. shift1={key['shift1']} shift2={key['shift2']} "
+              f"score={key['score']:.3f} ({key['equivalentKeys']} equivalent keys)")
+    return True
+
+
+# compact binary format, see cipher_format.py
+# direction is "encrypt", "decrypt", "compact" (legacy -> compact) or "legacy"
+def processCompact(direction, shift1, shift2, inputPath, outputPath, chunkSize=CHUNK_SIZE):
+    textInput = direction in ["encrypt", "compact"]
+    try:
+        inputFile = openInput(inputPath) if textInput else openBinaryInput(inputPath)
+    except OSError:
+        print(f"{inputPath} file not found.", file=sys.stderr)
+        return False
+
+    outputFile = openBinaryOutput(outputPath) if textInput else openOutput(outputPath)
+
+    try:
+        if direction == "encrypt":
+            encryptCompact(inputFile, outputFile, shift1, shift2, chunkSize)
+        elif direction == "decrypt":
+            decryptCompact(inputFile, outputFile, shift1, shift2)
+        elif direction == "compact":
+            legacyToCompact(inputFile, outputFile, shift1, shift2, chunkSize)
+        else:
+            compactToLegacy(inputFile, outputFile, shift1, shift2)
+        ok = True
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        ok = False
+
+    closeFile(inputFile)
+    closeFile(outputFile)
+    return ok
+
+
+# original interactive flow
+def runInteractive():
+    shift1Input = input("Enter shift1 value: ")
+    shift2Input = input("Enter shift2 value: ")
+
+    if not shift1Input.isdigit() or not shift2Input.isdigit():
+        print("Shift values must be whole numbers.")
+        return
 
-if not shift1Input.isdigit() or not shift2Input.isdigit():
-    print("Shift values must be whole numbers.")
-else:
     shift1 = int(shift1Input)
     shift2 = int(shift2Input)
 
@@ -143,3 +213,110 @@ else:
         encryptFile(shift1, shift2)
         decryptFile(shift1, shift2)
         verifyDecryption()
+
+
+def positiveInt(value):
+    if not value.isdigit() or int(value) <= 0:
+        raise argparse.ArgumentTypeError("Shift values must be positive whole numbers.")
+    return int(value)
+
+
+def buildParser():
+    parser = argparse.ArgumentParser(
+        description="Encrypt, decrypt and verify text files. "
+                    "Run without arguments for the interactive prompts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name in ["encrypt", "decrypt"]:
+        sub = commands.add_parser(name, help=f"{name} a file or directory ('-' for stdin/stdout)")
+        sub.add_argument("--shift1", type=positiveInt, required=True)
+        sub.add_argument("--shift2", type=positiveInt, required=True)
+        sub.add_argument("-i", "--input", default="-", help="input path (default: stdin)")
+        sub.add_argument("-o", "--output", default="-", help="output path (default: stdout)")
+        sub.add_argument("--chunk-size", type=positiveInt, default=CHUNK_SIZE,
+                         help="characters read per chunk")
+        sub.add_argument("-w", "--workers", type=positiveInt, default=1,
+                         help="worker processes (default: 1)")
+        sub.add_argument("--format", choices=["legacy", "compact"], default="legacy",
+                         help="ciphertext format (default: legacy)")
+
+    convert = commands.add_parser("convert", help="convert ciphertext between formats")
+    convert.add_argument("--to", choices=["legacy", "compact"], required=True)
+    convert.add_argument("--shift1", type=positiveInt, required=True)
+    convert.add_argument("--shift2", type=positiveInt, required=True)
+    convert.add_argument("-i", "--input", default="-", help="input path (default: stdin)")
+    convert.add_argument("-o", "--output", default="-", help="output path (default: stdout)")
+    convert.add_argument("--chunk-size", type=positiveInt, default=CHUNK_SIZE)
+
+    verify = commands.add_parser("verify", help="check that two files match")
+    verify.add_argument("original")
+    verify.add_argument("decrypted")
+    verify.add_argument("--chunk-size", type=positiveInt, default=CHUNK_SIZE)
+
+    roundTrip = commands.add_parser("roundtrip",
+                                    help="check a key pair round-trips without writing files")
+    roundTrip.add_argument("--shift1", type=positiveInt, required=True)
+    roundTrip.add_argument("--shift2", type=positiveInt, required=True)
+    roundTrip.add_argument("-i", "--input", default="-", help="input path (default: stdin)")
+    roundTrip.add_argument("--keep-encrypted", help="also write the encrypted text here")
+    roundTrip.add_argument("--keep-decrypted", help="also write the decrypted text here")
+    roundTrip.add_argument("--chunk-size", type=positiveInt, default=CHUNK_SIZE)
+
+    recover = commands.add_parser("recover", help="rank likely key pairs for a ciphertext")
+    recover.add_argument("-i", "--input", default="-", help="input path (default: stdin)")
+    recover.add_argument("--max-shift", type=positiveInt, default=100,
+                         help="try shift values 1..N (default: 100)")
+    recover.add_argument("--top", type=positiveInt, default=5)
+    recover.add_argument("--chunk-size", type=positiveInt, default=CHUNK_SIZE)
+
+    return parser
+
+
+# whole directory tree, one file per worker task
+def processDirectory(args):
+    if args.output == "-":
+        print("An output directory is needed for a directory input.", file=sys.stderr)
+        return False
+
+    failed = processTree(args.shift1, args.shift2, args.input, args.output,
+                         decrypt=(args.command == "decrypt"), workers=args.workers)
+    for path in failed:
+        print(f"Could not {args.command} file: {path}", file=sys.stderr)
+    return len(failed) == 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 0:
+        runInteractive()
+        return 0
+
+    args = buildParser().parse_args(argv)
+
+    if args.command == "verify":
+        ok = verifyDecryption(args.original, args.decrypted, args.chunk_size)
+    elif args.command == "roundtrip":
+        ok = checkRoundTrip(args.shift1, args.shift2, args.input, args.keep_encrypted,
+                            args.keep_decrypted, args.chunk_size)
+    elif args.command == "recover":
+        ok = recoverKeys(args.input, args.max_shift, args.top, args.chunk_size)
+    elif args.command == "convert":
+        ok = processCompact(args.to, args.shift1, args.shift2, args.input,
+                            args.output, args.chunk_size)
+    elif args.format == "compact":
+        ok = processCompact(args.command, args.shift1, args.shift2, args.input,
+                            args.output, args.chunk_size)
+    elif os.path.isdir(args.input):
+        ok = processDirectory(args)
+    elif args.command == "encrypt":
+        ok = encryptFile(args.shift1, args.shift2, args.input, args.output,
+                         args.chunk_size, args.workers)
+    else:
+        ok = decryptFile(args.shift1, args.shift2, args.input, args.output,
+                         args.chunk_size, args.workers)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,12 @@
-import pandas as pd
+import argparse
 import os
-import math
+
+from temperature_data import loadTemperatures, MONTH_COLUMNS
+from temperature_stats import computeWide, writeReports
+from temperature_trends import trendFrame, writeTrendReport
+from temperature_trace import Tracer, NULL_TRACER
+from temperature_accumulators import (TemperatureAccumulator, MissingColumnError,
+                                      accumulateTemperatures)
 
 # map months to Australian seasons
 def getSeason(month):
@@ -15,109 +21,173 @@ def getSeason(month):
     else:
         return None
 
-def analyseTemperatures():
 
-    folderPath = "temperatures"
+# original long format path: melt, per-row season lookup, three groupbys
+def meltLong(data, tracer=NULL_TRACER):
+    with tracer.span("melt", rows=len(data)) as span:
+        longData = data.melt(
+            id_vars=["STATION_NAME"],
+            value_vars=MONTH_COLUMNS,
+            var_name="Month",
+            value_name="Temperature"
+        )
+        span.add(outRows=len(longData))
 
-    # basic folder check
-    if not os.path.exists(folderPath):
-        print("Temperatures folder not found.")
-        return
+    # remove missing temperature values
+    with tracer.span("dropna") as span:
+        longData = longData.dropna(subset=["Temperature"])
+        span.add(outRows=len(longData))
 
-    dataFrames = []
+    # assign seasons
+    with tracer.span("season-apply", rows=len(longData)):
+        longData["Season"] = longData["Month"].apply(getSeason)
+    return longData
 
-    # read CSV files
-    for fileName in os.listdir(folderPath):
-        if fileName.endswith(".csv"):
-            filePath = os.path.join(folderPath, fileName)
-            try:
-                df = pd.read_csv(filePath)
-                dataFrames.append(df)
-            except:
-                print(f"Could not read file: {fileName}")
 
-    if len(dataFrames) == 0:
-        print("No temperature data files found.")
-        return
+def aggregateLong(longData, tracer=NULL_TRACER):
+    # Seasonal Average
+    with tracer.span("groupby-season", rows=len(longData)):
+        seasonalAvg = longData.groupby("Season")["Temperature"].mean().to_dict()
 
-    # combine all years
-    data = pd.concat(dataFrames, ignore_index=True)
+    # Temperature Range and Stability
+    with tracer.span("groupby-range", rows=len(longData)):
+        stationStats = longData.groupby("STATION_NAME", observed=True)["Temperature"].agg(["max", "min"])
+        stationStats["range"] = stationStats["max"] - stationStats["min"]
+    with tracer.span("groupby-std", rows=len(longData)):
+        stationStats["std"] = longData.groupby("STATION_NAME", observed=True)["Temperature"].std()
 
-    # expected columns
-    monthColumns = [
-        "January", "February", "March", "April", "May", "June",
-        "July", "August", "September", "October", "November", "December"
-    ]
+    return seasonalAvg, stationStats
 
-    # simple column check
-    if "STATION_NAME" not in data.columns:
-        print("STATION_NAME column missing in data.")
-        return
 
-    for month in monthColumns:
-        if month not in data.columns:
-            print(f"Missing month column: {month}")
-            return
+def computeLong(data, tracer=NULL_TRACER):
+    return aggregateLong(meltLong(data, tracer), tracer)
 
-    # convert wide data to long format
-    longData = data.melt(
-        id_vars=["STATION_NAME"],
-        value_vars=monthColumns,
-        var_name="Month",
-        value_name="Temperature"
-    )
 
-    # remove missing temperature values
-    longData = longData.dropna(subset=["Temperature"])
+# streaming path: one year file at a time into mergeable accumulators
+# saved partial results from other runs can be merged in before reporting
+def analyseStreaming(folderPath, useCache=True, mergePaths=(), savePath=None, tracer=NULL_TRACER):
+    try:
+        with tracer.span("ingest"):
+            accumulator = accumulateTemperatures(folderPath, useCache, tracer=tracer)
+    except MissingColumnError as e:
+        print(e)
+        return
+
+    with tracer.span("merge-partials", files=len(mergePaths)):
+        for path in mergePaths:
+            try:
+                accumulator = accumulator.merge(TemperatureAccumulator.load(path))
+            except (OSError, KeyError, ValueError):
+                print(f"Could not read partial result: {path}")
+                return
 
-    if longData.empty:
+    if savePath:
+        with tracer.span("save-partial"):
+            accumulator.save(savePath)
+
+    if accumulator.isEmpty():
         print("No valid temperature values found.")
         return
 
-    # assign seasons
-    longData["Season"] = longData["Month"].apply(getSeason)
+    with tracer.span("station-statistics"):
+        seasonalAvg, stationStats = accumulator.seasonalAverages(), accumulator.stationStatistics()
+    with tracer.span("write-reports"):
+        writeReports(seasonalAvg, stationStats)
 
-    # Seasonal Average
-    seasonalAvg = longData.groupby("Season")["Temperature"].mean()
 
-    with open("average_temp.txt", "w") as file:
-        for season in ["Summer", "Autumn", "Winter", "Spring"]:
-            if season in seasonalAvg:
-                file.write(f"{season}: {seasonalAvg[season]:.1f}°C\n")
+def analyseTemperatures(folderPath="temperatures", useCache=True, mode="wide",
+                        mergePaths=(), savePath=None, trends=False, tracer=NULL_TRACER):
 
-    # Temperature Range
-    stationStats = longData.groupby("STATION_NAME")["Temperature"].agg(["max", "min"])
-    stationStats["range"] = stationStats["max"] - stationStats["min"]
+    # basic folder check
+    if not os.path.exists(folderPath):
+        print("Temperatures folder not found.")
+        return
 
-    maxRange = stationStats["range"].max()
-    rangeStations = stationStats[stationStats["range"] == maxRange]
+    if mode == "stream":
+        analyseStreaming(folderPath, useCache, mergePaths, savePath, tracer)
+        return
 
-    with open("largest_temp_range_station.txt", "w") as file:
-        for station, row in rangeStations.iterrows():
-            file.write(
-                f"Station {station}: Range {row['range']:.1f}°C "
-                f"(Max: {row['max']:.1f}°C, Min: {row['min']:.1f}°C)\n"
-            )
+    # read CSV files, parsed years are reused from the cache
+    with tracer.span("ingest") as span:
+        data = loadTemperatures(folderPath, useCache, tracer=tracer)
+        span.add(rows=0 if data is None else len(data))
 
-    # Temperature Stability
-    stdDevs = longData.groupby("STATION_NAME")["Temperature"].std()
+    if data is None:
+        print("No temperature data files found.")
+        return
 
-    minStd = stdDevs.min()
-    maxStd = stdDevs.max()
+    # simple column check
+    if "STATION_NAME" not in data.columns:
+        print("STATION_NAME column missing in data.")
+        return
+
+    for month in MONTH_COLUMNS:
+        if month not in data.columns:
+            print(f"Missing month column: {month}")
+            return
 
-    with open("temperature_stability_stations.txt", "w") as file:
+    with tracer.span("validate"):
+        noValues = data[MONTH_COLUMNS].isna().all().all()
+    if noValues:
+        print("No valid temperature values found.")
+        return
 
-        for station, std in stdDevs.items():
-            if math.isclose(std, minStd):
-                file.write(
-                    f"Most Stable: Station {station}: StdDev {std:.1f}°C\n"
-                )
+    if mode == "long":
+        seasonalAvg, stationStats = computeLong(data, tracer)
+    else:
+        seasonalAvg, stationStats = computeWide(data, tracer)
+
+    with tracer.span("write-reports"):
+        writeReports(seasonalAvg, stationStats)
+
+    # warming slope per station and season, from the year of each file
+    if trends:
+        with tracer.span("trends", rows=len(data)):
+            writeTrendReport(trendFrame(data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse the station temperature files.")
+    parser.add_argument("--folder", default="temperatures", help="folder with the year CSV files")
+    parser.add_argument("--mode", choices=["wide", "long", "stream"], default="wide",
+                        help="wide: column-block engine (default), long: original melt path, "
+                             "stream: one file at a time into mergeable accumulators")
+    parser.add_argument("--no-cache", action="store_true", help="parse every file again")
+    parser.add_argument("--merge", nargs="+", default=[], metavar="FILE",
+                        help="stream mode: merge saved partial results (.npz) into this run")
+    parser.add_argument("--save", metavar="FILE",
+                        help="stream mode: save the combined accumulators as .npz")
+    parser.add_argument("--trends", action="store_true",
+                        help="also write station_temp_trends.csv (degrees C per decade)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write stage timings: .json as a Chrome trace, otherwise JSON lines")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="with --trace: per-stage allocation peaks via tracemalloc (slower)")
+    parser.add_argument("--profile", metavar="FILE", help="write cProfile stats for the whole run")
+    args = parser.parse_args()
+
+    if (args.merge or args.save) and args.mode != "stream":
+        parser.error("--merge and --save need --mode stream")
+    if args.trends and args.mode == "stream":
+        parser.error("--trends needs --mode wide or long")
+    if args.trace_memory and not args.trace:
+        parser.error("--trace-memory needs --trace")
+
+    tracer = NULL_TRACER
+    if args.trace or args.profile:
+        tracer = Tracer(memory=args.trace_memory, profilePath=args.profile)
+        tracer.start()
+
+    try:
+        with tracer.span("total", mode=args.mode):
+            analyseTemperatures(args.folder, not args.no_cache, args.mode, args.merge,
+                                args.save, args.trends, tracer)
+    finally:
+        tracer.stop()
+        if args.trace:
+            tracer.write(args.trace)
 
-        for station, std in stdDevs.items():
-            if math.isclose(std, maxStd):
-                file.write(
-                    f"Most Variable: Station {station}: StdDev {std:.1f}°C\n"
-                )
 
 # run program
-analyseTemperatures()
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,28 @@
 import turtle
 import sys
 
-# Recursive function for one edge
-def drawEdge(length, depth):
-    if depth == 0:
-        turtle.forward(length)
-        return
+from koch_geometry import kochPolygon, MAX_DEPTH
 
-    part = length / 3
+# points per canvas line item, consecutive items share their end point
+CANVAS_CHUNK_POINTS = 1 << 16
 
-    drawEdge(part, depth - 1)
-
-    turtle.left(60)
-    drawEdge(part, depth - 1)
-
-    turtle.right(120)
-    drawEdge(part, depth - 1)
+# Draw the polygon (counter-clockwise) from the precomputed outline
+# turtle.goto copies the turtle's item list on every call, so the outline
+# goes onto the canvas as a few long lines, scaled and y-flipped like turtle's own
+def drawPolygon(sides, length, depth):
+    points = kochPolygon(sides, length, depth, turtle.position())
+    screen = turtle.getscreen()
+    canvas = turtle.getcanvas()
+    pixels = points * (screen.xscale, -screen.yscale)
 
-    turtle.left(60)
-    drawEdge(part, depth - 1)
+    for start in range(0, len(pixels) - 1, CANVAS_CHUNK_POINTS):
+        chunk = pixels[start:start + CANVAS_CHUNK_POINTS + 1]
+        canvas.create_line(*chunk.ravel().tolist(), fill=turtle.pencolor(),
+                           width=turtle.pensize(), capstyle="round", joinstyle="round")
 
-# Draw the polygon (counter-clockwise)
-def drawPolygon(sides, length, depth):
-    angle = 360 / sides
-    for _ in range(sides):
-        drawEdge(length, depth)
-        turtle.left(angle)
+    turtle.penup()
+    turtle.goto(points[-1][0], points[-1][1])
+    turtle.pendown()
 
 def main():
     # Input validation
@@ -59,8 +56,8 @@ def main():
         print("Recursion depth cannot be negative.")
         sys.exit()
 
-    if depth > 6:
-        print("Recursion depth too large. Please use 6 or less.")
+    if depth > MAX_DEPTH:
+        print(f"Recursion depth too large. Please use {MAX_DEPTH} or less.")
         sys.exit()
 
     # Turtle setup
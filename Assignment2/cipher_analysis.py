@@ -0,0 +1,116 @@
+import numpy as np
+
+from cipher_engine import CHUNK_SIZE, FIRST_TAG, findRuleTags, textToCodes
+
+# relative letter frequencies of English text, a..z
+ENGLISH_FREQUENCIES = np.array([
+    8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966,
+    0.153, 0.772, 4.025, 2.406, 6.749, 7.507, 1.929, 0.095, 5.987,
+    6.327, 9.056, 2.758, 0.978, 2.360, 0.150, 1.974, 0.074,
+]) / 100.0
+
+# log weight for a letter a rule can never produce (e.g. rule 1 giving 'q')
+IMPOSSIBLE_WEIGHT = np.log(1e-9)
+
+# first letter of the alphabet each rule works in
+RULE_BASES = np.array([ord('a'), ord('a'), ord('A'), ord('A')])
+
+# which half of the alphabet each rule's plaintext letters come from
+RULE_HALVES = [slice(0, 13), slice(13, 26), slice(0, 13), slice(13, 26)]
+
+
+# count (rule, encrypted letter) pairs in legacy ciphertext, one pass
+def tallyCiphertext(inputFile, chunkSize=CHUNK_SIZE):
+    histogram = np.zeros(4 * 26, dtype=np.int64)
+    leftover = ""
+
+    while True:
+        chunk = inputFile.read(chunkSize)
+        if not chunk:
+            break
+
+        codes = textToCodes(leftover + chunk)
+        tagMask = findRuleTags(codes)
+        leftover = ""
+        if tagMask[-1]:
+            leftover = chr(codes[-1])
+            tagMask[-1] = False
+
+        tagPos = np.flatnonzero(tagMask)
+        rules = codes[tagPos].astype(np.int64) - FIRST_TAG
+        letters = codes[tagPos + 1].astype(np.int64) - RULE_BASES[rules]
+
+        # skip anything that is not a letter of the rule's case
+        valid = (letters >= 0) & (letters < 26)
+        histogram += np.bincount(rules[valid] * 26 + letters[valid], minlength=4 * 26)
+
+    return histogram.reshape(4, 26)
+
+
+# scores[rule, offset]: log likelihood of the rule's letters when the
+# rule shifted them forward by offset (mod 26)
+def offsetScores(histogram):
+    letters = np.arange(26)
+    offsets = np.arange(26)
+    # plainIndex[offset, letter] = letter the ciphertext letter came from
+    plainIndex = (letters[None, :] - offsets[:, None]) % 26
+
+    scores = np.empty((4, 26))
+    for rule in range(4):
+        weights = np.full(26, IMPOSSIBLE_WEIGHT)
+        weights[RULE_HALVES[rule]] = np.log(ENGLISH_FREQUENCIES[RULE_HALVES[rule]])
+        scores[rule] = weights[plainIndex] @ histogram[rule]
+    return scores
+
+
+# the four forward offsets mod 26; keys with the same offsets encrypt
+# every letter the same way and can't be told apart
+def keyOffsets(shift1, shift2):
+    shift1 = np.asarray(shift1, dtype=np.int64)
+    shift2 = np.asarray(shift2, dtype=np.int64)
+    return np.stack([
+        (shift1 * shift2) % 26,
+        -(shift1 + shift2) % 26,
+        -shift1 % 26,
+        (shift2 * shift2) % 26,
+    ])
+
+
+# smallest value and number of values for each residue mod 26
+def residueClasses(values):
+    values = np.asarray(values, dtype=np.int64).ravel()
+    counts = np.bincount(values % 26, minlength=26)
+    smallest = np.full(26, np.iinfo(np.int64).max)
+    np.minimum.at(smallest, values % 26, values)
+    return smallest, counts
+
+
+# score every (shift1, shift2) pair from the two ranges at once
+# shift1 mod 26 is fixed by rule 3 and shift2 mod 26 then by rule 2, so
+# the keys collapse to at most 26 x 26 classes with identical mappings
+# returns the best classes, highest score first
+def rankKeys(histogram, shift1Values=range(1, 101), shift2Values=range(1, 101), top=10):
+    smallest1, counts1 = residueClasses(shift1Values)
+    smallest2, counts2 = residueClasses(shift2Values)
+    classSizes = counts1[:, None] * counts2[None, :]
+    residue1, residue2 = np.nonzero(classSizes)
+    if len(residue1) == 0:
+        return []
+
+    offsets = keyOffsets(residue1, residue2)
+    scores = offsetScores(histogram)
+    classScores = (scores[0, offsets[0]] + scores[1, offsets[1]] +
+                   scores[2, offsets[2]] + scores[3, offsets[3]])
+
+    letterCount = max(int(histogram.sum()), 1)
+    order = np.argsort(-classScores, kind="stable")[:top]
+
+    ranked = []
+    for i in order:
+        ranked.append({
+            "shift1": int(smallest1[residue1[i]]),
+            "shift2": int(smallest2[residue2[i]]),
+            "score": float(classScores[i] / letterCount),
+            "equivalentKeys": int(classSizes[residue1[i], residue2[i]]),
+        })
+    return ranked
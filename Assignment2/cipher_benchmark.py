@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import string
+import sys
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from cipher_engine import (CipherTables, CHUNK_SIZE, encryptStream, decryptStream,
+                           compareStreams, roundTripCheck)
+from cipher_parallel import parallelEncryptStream, parallelDecryptStream
+from cipher_format import encryptCompact, decryptCompact
+
+# characters and line length used by each synthetic input
+# digits 1-4 are left out so every profile round-trips
+PROFILES = {
+    "lowercase": (string.ascii_lowercase + " " * 6, 80),
+    "mixed-case": (string.ascii_letters + " " * 10, 80),
+    "punctuation": (string.ascii_letters + string.punctuation * 2 + "05678 ", 80),
+    "long-lines": (string.ascii_lowercase + " " * 6, 1 << 20),
+    "short-lines": (string.ascii_lowercase + " ", 8),
+}
+
+MODES = ["stream", "parallel", "compact", "roundtrip"]
+
+SIZE_UNITS = {"KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+
+def parseSize(text):
+    text = text.strip().upper()
+    for unit, factor in SIZE_UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+# write size bytes of the profile's text, built from one repeated block
+def generateInput(path, profile, size, seed=0):
+    alphabet, lineLength = PROFILES[profile]
+    rng = random.Random(seed)
+
+    blockSize = min(size, 1 << 20)
+    chars = rng.choices(alphabet, k=blockSize)
+    for i in range(lineLength - 1, blockSize, lineLength):
+        chars[i] = "\n"
+    block = "".join(chars)
+
+    with open(path, "w") as f:
+        written = 0
+        while written < size:
+            part = block[:size - written]
+            f.write(part)
+            written += len(part)
+
+
+def timePhase(phases, name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    phases[name] = time.perf_counter() - start
+    return result
+
+
+def runEncryptDecrypt(mode, inputPath, workDir, shift1, shift2, workers, chunkSize):
+    tables = CipherTables(shift1, shift2)
+    encryptedPath = os.path.join(workDir, "encrypted.bin" if mode == "compact" else "encrypted.txt")
+    decryptedPath = os.path.join(workDir, "decrypted.txt")
+    phases = {}
+
+    binary = "b" if mode == "compact" else ""
+    with open(inputPath, "r") as src, open(encryptedPath, "w" + binary) as dst:
+        if mode == "stream":
+            timePhase(phases, "encrypt", encryptStream, src, dst, tables, chunkSize)
+        elif mode == "parallel":
+            timePhase(phases, "encrypt", parallelEncryptStream, src, dst,
+                      shift1, shift2, workers, chunkSize)
+        else:
+            timePhase(phases, "encrypt", encryptCompact, src, dst, shift1, shift2, chunkSize)
+
+    with open(encryptedPath, "r" + binary) as src, open(decryptedPath, "w") as dst:
+        if mode == "stream":
+            timePhase(phases, "decrypt", decryptStream, src, dst, tables, chunkSize)
+        elif mode == "parallel":
+            timePhase(phases, "decrypt", parallelDecryptStream, src, dst,
+                      shift1, shift2, workers, chunkSize)
+        else:
+            timePhase(phases, "decrypt", decryptCompact, src, dst, shift1, shift2)
+
+    with open(inputPath, "r") as a, open(decryptedPath, "r") as b:
+        mismatch = timePhase(phases, "verify", compareStreams, a, b, chunkSize)
+
+    encryptedSize = os.path.getsize(encryptedPath)
+    os.remove(encryptedPath)
+    os.remove(decryptedPath)
+    return phases, mismatch is None, encryptedSize
+
+
+# runs in a fresh process so the peak RSS belongs to this case only
+def runCase(mode, inputPath, workDir, shift1, shift2, workers, chunkSize):
+    if mode == "roundtrip":
+        phases = {}
+        with open(inputPath, "r") as src:
+            mismatch = timePhase(phases, "roundtrip", roundTripCheck,
+                                 src, CipherTables(shift1, shift2), chunkSize)
+        ok, encryptedSize = mismatch is None, None
+    else:
+        phases, ok, encryptedSize = runEncryptDecrypt(mode, inputPath, workDir, shift1,
+                                                      shift2, workers, chunkSize)
+
+    peakKb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    childPeakKb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return phases, ok, encryptedSize, peakKb, childPeakKb
+
+
+def runBenchmarks(profiles, sizes, modes, workDir, shift1=3, shift2=4,
+                  workers=None, chunkSize=CHUNK_SIZE, log=None):
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context("spawn")
+    cases = []
+
+    for profile in profiles:
+        for size in sizes:
+            inputPath = os.path.join(workDir, f"{profile}_{size}.txt")
+            generateInput(inputPath, profile, size)
+            megabytes = os.path.getsize(inputPath) / 1e6
+
+            for mode in modes:
+                with ProcessPoolExecutor(1, mp_context=context) as pool:
+                    phases, ok, encryptedSize, peakKb, childPeakKb = pool.submit(
+                        runCase, mode, inputPath, workDir, shift1, shift2,
+                        workers, chunkSize).result()
+
+                case = {
+                    "profile": profile,
+                    "sizeBytes": size,
+                    "mode": mode,
+                    "workers": workers if mode == "parallel" else 1,
+                    "roundTripOk": ok,
+                    "encryptedBytes": encryptedSize,
+                    "phaseSeconds": phases,
+                    "phaseMBps": {name: (megabytes / sec if sec > 0 else None)
+                                  for name, sec in phases.items()},
+                    "peakRssKb": peakKb,
+                    "workerPeakRssKb": childPeakKb if mode == "parallel" else None,
+                }
+                cases.append(case)
+                if log is not None:
+                    rates = ", ".join(f"{name} {rate:.1f} MB/s"
+                                      for name, rate in case["phaseMBps"].items() if rate)
+                    print(f"{profile:12} {size:>12} {mode:10} {rates}", file=log)
+
+            os.remove(inputPath)
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        "chunkSize": chunkSize,
+        "shifts": [shift1, shift2],
+        "cases": cases,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the A2.1 cipher.")
+    parser.add_argument("--profiles", default=",".join(PROFILES),
+                        help="comma separated input profiles")
+    parser.add_argument("--sizes", default="1KB,1MB,16MB",
+                        help="comma separated sizes, e.g. 1KB,100MB,1GB")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma separated modes")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="workers for parallel mode (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--work-dir", default=None,
+                        help="where inputs are generated (default: a temp dir)")
+    parser.add_argument("-o", "--output", default="-", help="JSON report path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    profiles = args.profiles.split(",")
+    modes = args.modes.split(",")
+    for name in profiles:
+        if name not in PROFILES:
+            parser.error(f"unknown profile: {name}")
+    for name in modes:
+        if name not in MODES:
+            parser.error(f"unknown mode: {name}")
+    sizes = [parseSize(s) for s in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as workDir:
+        report = runBenchmarks(profiles, sizes, modes, workDir, workers=args.workers,
+                               chunkSize=args.chunk_size, log=sys.stderr)
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+import string
+import numpy as np
+
+# rule digits written in front of every encrypted letter
+RULE_TAGS = "1234"
+
+# code points of the rule digits '1'..'4'
+FIRST_TAG = ord("1")
+LAST_TAG = ord("4")
+
+
+# forward shift applied by each rule (rule 1 is index 0)
+def ruleShifts(shift1, shift2):
+    return (shift1 * shift2, -(shift1 + shift2), -shift1, shift2 * shift2)
+
+
+# encrypt a single letter, same result as the original wrap loops
+def encryptLetter(ch, shift1, shift2):
+    shifts = ruleShifts(shift1, shift2)
+
+    if 'a' <= ch <= 'z':
+        base = ord('a')
+        rule = 1 if ch <= 'm' else 2
+    elif 'A' <= ch <= 'Z':
+        base = ord('A')
+        rule = 3 if ch <= 'M' else 4
+    else:
+        return ch
+
+    newPos = base + (ord(ch) - base + shifts[rule - 1]) % 26
+    return str(rule) + chr(newPos)
+
+
+# undo a rule for any code points (vectorised)
+# rules 1 and 4 only ever wrap upwards, rules 2 and 3 only downwards,
+# so characters outside the alphabet come out exactly as before
+def undoRules(rules, codes, shift1, shift2):
+    shifts = np.array(ruleShifts(shift1, shift2), dtype=np.int64)
+    lowBound = np.array([ord('a'), -2**62, -2**62, ord('A')], dtype=np.int64)
+    highBound = np.array([2**62, ord('z'), ord('Z'), 2**62], dtype=np.int64)
+
+    rules = np.asarray(rules, dtype=np.int64)
+    orig = np.asarray(codes, dtype=np.int64) - shifts[rules]
+    low = lowBound[rules]
+    high = highBound[rules]
+
+    under = orig < low
+    orig[under] += ((low[under] - orig[under] + 25) // 26) * 26
+    over = orig > high
+    orig[over] -= ((orig[over] - high[over] + 25) // 26) * 26
+    return orig
+
+
+# precomputed mapping and inverse for one key pair
+class CipherTables:
+    def __init__(self, shift1, shift2):
+        self.shift1 = shift1
+        self.shift2 = shift2
+
+        # forward lookup for every ascii char: letter, rule tag and flag
+        self.encryptLut = np.arange(128, dtype=np.uint32)
+        self.tagLut = np.zeros(128, dtype=np.uint32)
+        self.letterMask = np.zeros(128, dtype=bool)
+        for ch in string.ascii_letters:
+            pair = encryptLetter(ch, shift1, shift2)
+            self.tagLut[ord(ch)] = ord(pair[0])
+            self.encryptLut[ord(ch)] = ord(pair[1])
+            self.letterMask[ord(ch)] = True
+
+        # inverse lookup for every (rule, ascii char) pair
+        rules = np.repeat(np.arange(4), 128)
+        codes = np.tile(np.arange(128), 4)
+        self.decryptLut = undoRules(rules, codes, shift1, shift2).astype(np.uint32).reshape(4, 128)
+
+
+# find which characters are rule tags
+# inside a run of digits 1-4 every second digit is a tag and the one
+# after it is the letter it belongs to, which matches the left-to-right scan
+def findRuleTags(codes):
+    tagMask = np.zeros(len(codes), dtype=bool)
+    digitPos = np.flatnonzero((codes >= FIRST_TAG) & (codes <= LAST_TAG))
+    if len(digitPos) == 0:
+        return tagMask
+
+    runStarts = np.ones(len(digitPos), dtype=bool)
+    runStarts[1:] = np.diff(digitPos) != 1
+
+    # no two digits next to each other, so every digit is a tag
+    if runStarts.all():
+        tagMask[digitPos] = True
+        return tagMask
+
+    index = np.arange(len(digitPos))
+    runStartIndex = np.maximum.accumulate(np.where(runStarts, index, 0))
+    tagMask[digitPos[((index - runStartIndex) & 1) == 0]] = True
+    return tagMask
+
+
+def textToCodes(text):
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+def codesToText(codes):
+    return codes.astype(np.uint32, copy=False).tobytes().decode("utf-32-le")
+
+
+def encryptText(text, tables):
+    if not text:
+        return ""
+
+    codes = textToCodes(text)
+    inTable = codes < 128
+    small = np.where(inTable, codes, 0)
+    isLetter = tables.letterMask[small] & inTable
+
+    # every letter gets its tag in front, so it moves right by the
+    # number of letters up to and including itself
+    shifted = np.arange(len(codes)) + np.cumsum(isLetter)
+    out = np.empty(len(codes) + int(isLetter.sum()), dtype=np.uint32)
+    out[shifted] = np.where(isLetter, tables.encryptLut[small], codes)
+    out[shifted[isLetter] - 1] = tables.tagLut[small[isLetter]]
+    return codesToText(out)
+
+
+# returns (decrypted text, unused trailing tag)
+# the trailing tag is only set when the text ends between a tag and its letter
+def decryptText(text, tables):
+    if not text:
+        return "", ""
+
+    codes = textToCodes(text)
+    tagMask = findRuleTags(codes)
+    leftover = ""
+
+    if tagMask[-1]:
+        leftover = text[-1]
+        text = text[:-1]
+        codes = codes[:-1]
+        tagMask = tagMask[:-1]
+
+    tagPos = np.flatnonzero(tagMask)
+    if len(tagPos) == 0:
+        return text, leftover
+
+    letterPos = tagPos + 1
+    rules = codes[tagPos] - FIRST_TAG
+    letters = codes[letterPos]
+
+    if letters.max() < 128:
+        decoded = tables.decryptLut[rules, letters]
+    else:
+        decoded = np.empty_like(letters)
+        inTable = letters < 128
+        decoded[inTable] = tables.decryptLut[rules[inTable], letters[inTable]]
+        decoded[~inTable] = undoRules(rules[~inTable], letters[~inTable],
+                                      tables.shift1, tables.shift2)
+
+    out = codes.copy()
+    out[letterPos] = decoded
+    return codesToText(out[~tagMask]), leftover
+
+
+# characters read per chunk when streaming files
+CHUNK_SIZE = 1 << 20
+
+
+def encryptStream(inputFile, outputFile, tables, chunkSize=CHUNK_SIZE):
+    while True:
+        chunk = inputFile.read(chunkSize)
+        if not chunk:
+            break
+        outputFile.write(encryptText(chunk, tables))
+
+
+# returns False when the input ends with a tag that has no letter
+def decryptStream(inputFile, outputFile, tables, chunkSize=CHUNK_SIZE):
+    leftover = ""
+    while True:
+        chunk = inputFile.read(chunkSize)
+        if not chunk:
+            break
+        # a tag cut off at the end of the last chunk pairs with the first char here
+        decrypted, leftover = decryptText(leftover + chunk, tables)
+        outputFile.write(decrypted)
+    return leftover == ""
+
+
+# index of the first differing character (or the shorter length)
+def firstDifference(textA, textB):
+    n = min(len(textA), len(textB))
+    diff = np.flatnonzero(textToCodes(textA[:n]) != textToCodes(textB[:n]))
+    return int(diff[0]) if len(diff) else n
+
+
+# offset of the first differing character, or None when both match
+def compareStreams(fileA, fileB, chunkSize=CHUNK_SIZE):
+    offset = 0
+    while True:
+        chunkA = fileA.read(chunkSize)
+        chunkB = fileB.read(chunkSize)
+        if chunkA != chunkB:
+            return offset + firstDifference(chunkA, chunkB)
+        if not chunkA:
+            return None
+        offset += len(chunkA)
+
+
+# encrypt, decrypt and compare in memory, one chunk at a time
+# returns the offset of the first character that does not come back
+# unchanged, or None; the intermediate texts are only written when
+# files are given for them
+def roundTripCheck(inputFile, tables, chunkSize=CHUNK_SIZE,
+                   encryptedFile=None, decryptedFile=None):
+    offset = 0
+    leftover = ""
+
+    # original and decrypted text that has not been matched yet, the
+    # two can drift apart when digits in the plaintext look like tags
+    pendingOriginal = ""
+    pendingDecrypted = ""
+
+    while True:
+        chunk = inputFile.read(chunkSize)
+        if chunk:
+            encrypted = encryptText(chunk, tables)
+            decrypted, leftover = decryptText(leftover + encrypted, tables)
+            if encryptedFile is not None:
+                encryptedFile.write(encrypted)
+            if decryptedFile is not None:
+                decryptedFile.write(decrypted)
+            pendingOriginal += chunk
+            pendingDecrypted += decrypted
+
+        matched = firstDifference(pendingOriginal, pendingDecrypted)
+        if matched < min(len(pendingOriginal), len(pendingDecrypted)):
+            return offset + matched
+
+        offset += matched
+        pendingOriginal = pendingOriginal[matched:]
+        pendingDecrypted = pendingDecrypted[matched:]
+
+        if not chunk:
+            if pendingOriginal or pendingDecrypted or leftover:
+                return offset
+            return None
@@ -0,0 +1,191 @@
+import hashlib
+import struct
+import numpy as np
+
+from cipher_engine import (CipherTables, CHUNK_SIZE, FIRST_TAG, findRuleTags,
+                           textToCodes, codesToText)
+
+# compact container layout
+#   header: magic, version, key hash, original length in characters
+#   frames: payload byte count, letter count, payload (utf-8), rule tags
+# the payload is the ciphertext without the tag digits and the tags
+# (rule - 1, two bits each) are packed four to a byte after it
+MAGIC = b"A21C"
+VERSION = 1
+HEADER = struct.Struct("<4sBQQ")
+FRAME = struct.Struct("<II")
+
+# written when the output cannot be rewound to fill in the length
+UNKNOWN_LENGTH = 2**64 - 1
+
+
+def keyHash(shift1, shift2):
+    digest = hashlib.sha256(f"{shift1}:{shift2}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def packRules(rules):
+    padded = np.zeros((len(rules) + 3) // 4 * 4, dtype=np.uint8)
+    padded[:len(rules)] = rules
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] | (quads[:, 1] << 2) | (quads[:, 2] << 4) | (quads[:, 3] << 6)).tobytes()
+
+
+def unpackRules(data, count):
+    packed = np.frombuffer(data, dtype=np.uint8)
+    quads = np.stack([packed & 3, (packed >> 2) & 3, (packed >> 4) & 3, packed >> 6], axis=1)
+    return quads.reshape(-1)[:count]
+
+
+def asciiLetterMask(codes):
+    lower = codes | 0x20
+    return (lower >= ord('a')) & (lower <= ord('z'))
+
+
+def writeHeader(outputFile, shift1, shift2, length):
+    outputFile.write(HEADER.pack(MAGIC, VERSION, keyHash(shift1, shift2), length))
+
+
+# fill in the length once it is known, when the output allows it
+def patchLength(outputFile, shift1, shift2, length):
+    if outputFile.seekable():
+        end = outputFile.tell()
+        outputFile.seek(0)
+        writeHeader(outputFile, shift1, shift2, length)
+        outputFile.seek(end)
+
+
+def readHeader(inputFile, shift1, shift2):
+    raw = inputFile.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError("Compact file header is truncated.")
+
+    magic, version, storedHash, length = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ValueError("Not a compact cipher file.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported compact format version: {version}")
+    if storedHash != keyHash(shift1, shift2):
+        raise ValueError("Shift values do not match the ones used for this file.")
+    return length
+
+
+# yields (payload codes, rules) for every frame
+def readFrames(inputFile):
+    while True:
+        raw = inputFile.read(FRAME.size)
+        if not raw:
+            return
+        if len(raw) < FRAME.size:
+            raise ValueError("Compact file frame is truncated.")
+
+        payloadSize, letterCount = FRAME.unpack(raw)
+        payload = inputFile.read(payloadSize)
+        tagBytes = inputFile.read((letterCount + 3) // 4)
+        if len(payload) < payloadSize or len(tagBytes) < (letterCount + 3) // 4:
+            raise ValueError("Compact file frame is truncated.")
+
+        yield textToCodes(payload.decode("utf-8")), unpackRules(tagBytes, letterCount)
+
+
+def writeFrame(outputFile, codes, rules):
+    payload = codesToText(codes).encode("utf-8")
+    outputFile.write(FRAME.pack(len(payload), len(rules)))
+    outputFile.write(payload)
+    outputFile.write(packRules(rules))
+
+
+# plaintext (text mode) -> compact ciphertext (binary mode)
+def encryptCompact(inputFile, outputFile, shift1, shift2, chunkSize=CHUNK_SIZE):
+    tables = CipherTables(shift1, shift2)
+    writeHeader(outputFile, shift1, shift2, UNKNOWN_LENGTH)
+    length = 0
+
+    while True:
+        chunk = inputFile.read(chunkSize)
+        if not chunk:
+            break
+        length += len(chunk)
+
+        codes = textToCodes(chunk)
+        isLetter = asciiLetterMask(codes)
+        letters = codes[isLetter]
+
+        encrypted = codes.copy()
+        encrypted[isLetter] = tables.encryptLut[letters]
+        writeFrame(outputFile, encrypted, tables.tagLut[letters] - FIRST_TAG)
+
+    patchLength(outputFile, shift1, shift2, length)
+
+
+# compact ciphertext (binary mode) -> plaintext (text mode)
+def decryptCompact(inputFile, outputFile, shift1, shift2):
+    tables = CipherTables(shift1, shift2)
+    length = readHeader(inputFile, shift1, shift2)
+    written = 0
+
+    for codes, rules in readFrames(inputFile):
+        isLetter = asciiLetterMask(codes)
+        if isLetter.sum() != len(rules):
+            raise ValueError("Compact file frame is corrupt.")
+
+        decrypted = codes.copy()
+        decrypted[isLetter] = tables.decryptLut[rules, codes[isLetter]]
+        outputFile.write(codesToText(decrypted))
+        written += len(codes)
+
+    if length != UNKNOWN_LENGTH and written != length:
+        raise ValueError("Compact file is shorter or longer than its header says.")
+
+
+# legacy text ciphertext -> compact, without decrypting
+# every tag must be followed by a letter and every letter must have a tag
+def legacyToCompact(inputFile, outputFile, shift1, shift2, chunkSize=CHUNK_SIZE):
+    writeHeader(outputFile, shift1, shift2, UNKNOWN_LENGTH)
+    length = 0
+    leftover = ""
+
+    while True:
+        chunk = inputFile.read(chunkSize)
+        if not chunk:
+            break
+
+        codes = textToCodes(leftover + chunk)
+        tagMask = findRuleTags(codes)
+        leftover = ""
+        if tagMask[-1]:
+            leftover = chr(codes[-1])
+            codes = codes[:-1]
+            tagMask = tagMask[:-1]
+
+        tagPos = np.flatnonzero(tagMask)
+        payload = codes[~tagMask]
+        if not asciiLetterMask(codes[tagPos + 1]).all() or \
+                asciiLetterMask(payload).sum() != len(tagPos):
+            raise ValueError("Encrypted file format error.")
+
+        writeFrame(outputFile, payload, codes[tagPos] - FIRST_TAG)
+        length += len(payload)
+
+    if leftover:
+        raise ValueError("Encrypted file format error.")
+
+    patchLength(outputFile, shift1, shift2, length)
+
+
+# compact -> legacy text ciphertext, without decrypting
+def compactToLegacy(inputFile, outputFile, shift1, shift2):
+    readHeader(inputFile, shift1, shift2)
+
+    for codes, rules in readFrames(inputFile):
+        isLetter = asciiLetterMask(codes)
+        if isLetter.sum() != len(rules):
+            raise ValueError("Compact file frame is corrupt.")
+
+        # put the tag digit back in front of each letter
+        shifted = np.arange(len(codes)) + np.cumsum(isLetter)
+        out = np.empty(len(codes) + len(rules), dtype=np.uint32)
+        out[shifted] = codes
+        out[shifted[isLetter] - 1] = rules.astype(np.uint32) + FIRST_TAG
+        outputFile.write(codesToText(out))
+
@@ -0,0 +1,120 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from cipher_engine import (CipherTables, RULE_TAGS, encryptText, decryptText,
+                           encryptStream, decryptStream)
+
+# characters per block handed to a worker
+BLOCK_SIZE = 4 << 20
+
+# tables for the key pair this worker process was started with
+workerTables = None
+
+
+def initWorker(shift1, shift2):
+    global workerTables
+    workerTables = CipherTables(shift1, shift2)
+
+
+def encryptBlock(block):
+    return encryptText(block, workerTables)
+
+
+def decryptBlock(block):
+    return decryptText(block, workerTables)
+
+
+def defaultWorkers():
+    return os.cpu_count() or 1
+
+
+# split a text stream into blocks that can be processed on their own
+# a block never ends on a digit 1-4, so a tag and its letter always stay
+# together and every block starts with a fresh left-to-right scan
+def readBlocks(inputFile, blockSize=BLOCK_SIZE):
+    while True:
+        block = inputFile.read(blockSize)
+        if not block:
+            return
+        while block[-1] in RULE_TAGS:
+            extra = inputFile.read(1024)
+            if not extra:
+                break
+            block += extra
+        yield block
+
+
+# run func over items in the pool and yield results in input order
+# only a few blocks are in flight at once so memory stays bounded
+def orderedMap(pool, func, items, maxPending):
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= maxPending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def parallelEncryptStream(inputFile, outputFile, shift1, shift2,
+                          workers=None, blockSize=BLOCK_SIZE):
+    workers = workers or defaultWorkers()
+    with ProcessPoolExecutor(workers, initializer=initWorker,
+                             initargs=(shift1, shift2)) as pool:
+        blocks = readBlocks(inputFile, blockSize)
+        for encrypted in orderedMap(pool, encryptBlock, blocks, workers * 2):
+            outputFile.write(encrypted)
+
+
+# returns False when the input ends with a tag that has no letter
+def parallelDecryptStream(inputFile, outputFile, shift1, shift2,
+                          workers=None, blockSize=BLOCK_SIZE):
+    workers = workers or defaultWorkers()
+    complete = True
+    with ProcessPoolExecutor(workers, initializer=initWorker,
+                             initargs=(shift1, shift2)) as pool:
+        blocks = readBlocks(inputFile, blockSize)
+        for decrypted, leftover in orderedMap(pool, decryptBlock, blocks, workers * 2):
+            outputFile.write(decrypted)
+            if leftover:
+                complete = False
+    return complete
+
+
+# one whole file, streamed inside a worker
+def processFile(shift1, shift2, inputPath, outputPath, decrypt):
+    tables = CipherTables(shift1, shift2)
+    with open(inputPath, "r") as inputFile, open(outputPath, "w") as outputFile:
+        if decrypt:
+            return decryptStream(inputFile, outputFile, tables)
+        encryptStream(inputFile, outputFile, tables)
+        return True
+
+
+# encrypt or decrypt every file under inputDir into the same layout under outputDir
+# returns the input paths that failed
+def processTree(shift1, shift2, inputDir, outputDir, decrypt=False, workers=None):
+    workers = workers or defaultWorkers()
+    failed = []
+
+    with ProcessPoolExecutor(workers) as pool:
+        jobs = {}
+        for root, dirs, files in os.walk(inputDir):
+            dirs.sort()
+            targetDir = os.path.join(outputDir, os.path.relpath(root, inputDir))
+            os.makedirs(targetDir, exist_ok=True)
+
+            for fileName in sorted(files):
+                src = os.path.join(root, fileName)
+                dst = os.path.join(targetDir, fileName)
+                jobs[src] = pool.submit(processFile, shift1, shift2, src, dst, decrypt)
+
+        for src, job in jobs.items():
+            try:
+                if not job.result():
+                    failed.append(src)
+            except (OSError, UnicodeDecodeError):
+                failed.append(src)
+
+    return failed
@@ -0,0 +1,150 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from koch_geometry import edgeTemplate, placeEdges, MAX_DEPTH
+from koch_render import writeSvg, writePng
+
+FORMATS = ["svg", "png", "npy"]
+
+
+# "3-12" -> [3, ..., 12], "3,5,8" -> [3, 5, 8]
+def parseInts(text):
+    values = []
+    for part in text.split(","):
+        if "-" in part:
+            low, high = part.split("-")
+            values.extend(range(int(low), int(high) + 1))
+        else:
+            values.append(int(part))
+    return values
+
+
+def parseFloats(text):
+    return [float(v) for v in text.split(",")]
+
+
+# every (sides, length, depth), grouped by depth so each worker
+# keeps reusing the same cached template
+def configGrid(sidesValues, lengths, depths):
+    return [(sides, length, depth) for depth in depths for sides in sidesValues for length in lengths]
+
+
+def fileStem(sides, length, depth):
+    return f"koch_s{sides}_l{length:g}_d{depth}"
+
+
+# runs in a worker; returns the manifest entry for one config
+def renderConfig(config, outputDir, formats, size, strokeWidth):
+    sides, length, depth = config
+    start = time.perf_counter()
+    cached = edgeTemplate.cache_info().hits
+    points = placeEdges(edgeTemplate(depth), sides, length, (-length / 2, -length / 2))
+    templateHit = edgeTemplate.cache_info().hits > cached
+    geometrySeconds = time.perf_counter() - start
+
+    files = {}
+    start = time.perf_counter()
+    for fmt in formats:
+        path = os.path.join(outputDir, f"{fileStem(sides, length, depth)}.{fmt}")
+        if fmt == "svg":
+            writeSvg(points, path, size, size, strokeWidth=strokeWidth)
+        elif fmt == "png":
+            writePng(points, path, width=size, height=size, strokeWidth=max(1, int(round(strokeWidth))))
+        else:
+            np.save(path, points)
+        files[fmt] = os.path.basename(path)
+    writeSeconds = time.perf_counter() - start
+
+    return {
+        "sides": sides,
+        "length": length,
+        "depth": depth,
+        "vertices": len(points) - 1,
+        "files": files,
+        "templateCached": templateHit,
+        "geometrySeconds": geometrySeconds,
+        "writeSeconds": writeSeconds,
+        "worker": os.getpid(),
+    }
+
+
+# renders every config across a process pool and writes manifest.json
+# returns the manifest
+def runBatch(configs, outputDir, formats=("svg",), size=800, strokeWidth=1.0, workers=None):
+    os.makedirs(outputDir, exist_ok=True)
+    start = time.perf_counter()
+
+    # consecutive configs share a depth, chunks keep them on one worker
+    workers = workers or os.cpu_count() or 1
+    chunkSize = max(1, len(configs) // (workers * 4))
+    with ProcessPoolExecutor(workers) as pool:
+        entries = list(pool.map(renderConfig, configs, [outputDir] * len(configs),
+                                [tuple(formats)] * len(configs), [size] * len(configs),
+                                [strokeWidth] * len(configs), chunksize=chunkSize))
+
+    manifest = {
+        "formats": list(formats),
+        "size": size,
+        "workers": workers,
+        "totalSeconds": time.perf_counter() - start,
+        "configs": entries,
+    }
+    with open(os.path.join(outputDir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a grid of Koch polygons in parallel.")
+    parser.add_argument("--sides", default="3-12", help="e.g. 3-12 or 3,4,6")
+    parser.add_argument("--depths", default="0-8", help="e.g. 0-8 or 2,4")
+    parser.add_argument("--lengths", default="100,300", help="comma separated side lengths")
+    parser.add_argument("-o", "--output-dir", required=True)
+    parser.add_argument("--formats", default="svg", help="comma separated: svg, png, npy")
+    parser.add_argument("--size", type=int, default=800, help="image width and height in pixels")
+    parser.add_argument("--stroke-width", type=float, default=1.0)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="default: all cores")
+    args = parser.parse_args(argv)
+
+    try:
+        sidesValues = parseInts(args.sides)
+        depths = parseInts(args.depths)
+        lengths = parseFloats(args.lengths)
+    except ValueError:
+        parser.error("--sides/--depths take numbers or ranges like 3-12, --lengths numbers")
+
+    formats = args.formats.split(",")
+    for fmt in formats:
+        if fmt not in FORMATS:
+            parser.error(f"unknown format: {fmt}")
+    if min(sidesValues) < 3:
+        parser.error("a polygon must have at least 3 sides")
+    if min(lengths) <= 0:
+        parser.error("side length must be greater than zero")
+    if min(depths) < 0:
+        parser.error("recursion depth cannot be negative")
+    if max(depths) > MAX_DEPTH:
+        parser.error(f"recursion depth too large, use {MAX_DEPTH} or less")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    configs = configGrid(sidesValues, lengths, depths)
+    try:
+        manifest = runBatch(configs, args.output_dir, formats, args.size, args.stroke_width, args.workers)
+    except OSError as e:
+        print(f"Could not write to {args.output_dir}: {e}")
+        return 1
+
+    vertices = sum(entry["vertices"] for entry in manifest["configs"])
+    print(f"Rendered {len(configs)} polygons ({vertices} vertices) in {manifest['totalSeconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
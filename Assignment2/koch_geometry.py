@@ -0,0 +1,80 @@
+from functools import lru_cache
+import numpy as np
+
+# templates kept per process, depth 10 alone is 16 MB
+TEMPLATE_CACHE_SIZE = 12
+
+# deepest full outline the programs build, depth 10 is about a million
+# points per side and every level multiplies that by 4
+MAX_DEPTH = 10
+
+# rotation by +60 degrees, the turtle's left(60) before each bump
+COS60 = 0.5
+SIN60 = np.sqrt(3.0) / 2.0
+
+
+# apex of the bump over the middle third, start + step + rot60(step)
+def bumpPeak(start, step):
+    return start + step + np.stack([step[:, 0] * COS60 - step[:, 1] * SIN60,
+                                    step[:, 0] * SIN60 + step[:, 1] * COS60], axis=1)
+
+
+# one Koch edge from (0, 0) to (1, 0), bump on the left like drawEdge
+# returns (4**depth + 1, 2) points, both ends included
+# each pass replaces every segment a->b by a, a+d, a+d+rot60(d), a+2d with d=(b-a)/3
+def unitEdge(depth):
+    points = np.array([[0.0, 0.0], [1.0, 0.0]])
+    for _ in range(depth):
+        start = points[:-1]
+        step = (points[1:] - start) / 3.0
+
+        refined = np.empty((4 * len(start) + 1, 2))
+        refined[0:-1:4] = start
+        refined[1::4] = start + step
+        refined[2::4] = bumpPeak(start, step)
+        refined[3::4] = start + 2.0 * step
+        refined[-1] = points[-1]
+        points = refined
+    return points
+
+
+# unitEdge memoised per depth, it doesn't depend on sides or length
+# the array is shared between callers so it is made read-only
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def edgeTemplate(depth):
+    template = unitEdge(depth)
+    template.flags.writeable = False
+    return template
+
+
+# polygon corners walked counter-clockwise from start, first heading 0
+# returns (sides, 2) edge start points and the (sides,) edge headings in radians
+def polygonCorners(sides, length, start):
+    headings = np.arange(sides) * (2.0 * np.pi / sides)
+    steps = length * np.stack([np.cos(headings), np.sin(headings)], axis=1)
+    corners = np.asarray(start, dtype=np.float64) + np.vstack([[0.0, 0.0], np.cumsum(steps, axis=0)[:-1]])
+    return corners, headings
+
+
+# place a unit edge template on every side of the polygon
+# one rotation per side, applied to the whole template with a single einsum
+def placeEdges(template, sides, length, start):
+    corners, headings = polygonCorners(sides, length, start)
+    cos, sin = np.cos(headings), np.sin(headings)
+    rotations = length * np.stack([np.stack([cos, sin], axis=1),
+                                   np.stack([-sin, cos], axis=1)], axis=1)
+
+    # template rows without the end point, the next edge starts there
+    edges = np.einsum("mi,sij->smj", template[:-1], rotations) + corners[:, None, :]
+    outline = np.empty((sides * (len(template) - 1) + 1, 2))
+    outline[:-1] = edges.reshape(-1, 2)
+    outline[-1] = corners[0]
+    return outline
+
+
+# full outline of the Koch polygon drawn by A2.3.py as an (N, 2) array
+# closed: the last point repeats the first; default start matches the turtle's
+def kochPolygon(sides, length, depth, start=None):
+    if start is None:
+        start = (-length / 2, -length / 2)
+    return placeEdges(edgeTemplate(depth), sides, length, start)
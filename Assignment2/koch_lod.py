@@ -0,0 +1,97 @@
+import numpy as np
+
+from koch_geometry import polygonCorners, bumpPeak
+
+# hard stop for the refinement, far past what a double can resolve anyway
+MAX_LEVELS = 40
+
+
+# the Koch curve over a->b stays inside the triangle a, b, peak with height
+# |ab| * sqrt(3) / 6, so a disc of radius |ab| / 2 round the midpoint holds it
+def segmentBounds(a, b):
+    middle = (a + b) / 2.0
+    radius = np.linalg.norm(b - a, axis=1)[:, None] / 2.0
+    return middle - radius, middle + radius
+
+
+def visibleMask(a, b, view):
+    if view is None:
+        return np.ones(len(a), dtype=bool)
+    low, high = segmentBounds(a, b)
+    return ((high[:, 0] >= view[0]) & (low[:, 0] <= view[2])
+            & (high[:, 1] >= view[1]) & (low[:, 1] <= view[3]))
+
+
+# world units per output pixel for a size x size image
+# of the view box, or of the whole polygon when there is no view
+def pixelSizeFor(sides, length, size, view=None, start=None, margin=0):
+    if view is None:
+        if start is None:
+            start = (-length / 2, -length / 2)
+        corners, _ = polygonCorners(sides, length, start)
+        # the bumps point inwards, the plain polygon bounds the outline
+        span = corners.max(axis=0) - corners.min(axis=0)
+    else:
+        span = np.array([view[2] - view[0], view[3] - view[1]])
+    return float(span.max()) / max(size - 2 * margin, 1)
+
+
+# one refinement step: segments in refine become their four Koch pieces,
+# the others are kept as they are; curve order is preserved
+def refineSegments(a, b, refine):
+    pieces = np.where(refine, 4, 1)
+    firstSlot = np.cumsum(pieces) - pieces
+    newA = np.empty((pieces.sum(), 2))
+    newB = np.empty((pieces.sum(), 2))
+
+    keep = ~refine
+    newA[firstSlot[keep]] = a[keep]
+    newB[firstSlot[keep]] = b[keep]
+
+    start, end = a[refine], b[refine]
+    step = (end - start) / 3.0
+    peak = bumpPeak(start, step)
+    third, twoThirds = start + step, start + 2.0 * step
+
+    slots = firstSlot[refine]
+    for offset, (pieceA, pieceB) in enumerate([(start, third), (third, peak),
+                                               (peak, twoThirds), (twoThirds, end)]):
+        newA[slots + offset] = pieceA
+        newB[slots + offset] = pieceB
+    return newA, newB
+
+
+def toOutline(a, b):
+    return np.vstack([a, b[-1:]])
+
+
+# coarse-to-fine outlines of the Koch polygon, one (level, points) per pass
+# a segment stops splitting once it is shorter than tolerance pixels or its
+# curve cannot reach the view box, so the work follows the output
+# resolution rather than 4**depth; depth=None refines until nothing is left
+def progressiveOutlines(sides, length, pixelSize, tolerance=1.0, depth=None, view=None, start=None):
+    if start is None:
+        start = (-length / 2, -length / 2)
+    corners, _ = polygonCorners(sides, length, start)
+    a = corners
+    b = np.roll(corners, -1, axis=0)
+    limit = MAX_LEVELS if depth is None else min(depth, MAX_LEVELS)
+    minLength = tolerance * pixelSize
+
+    level = 0
+    yield level, toOutline(a, b)
+    while level < limit:
+        refine = (np.linalg.norm(b - a, axis=1) > minLength) & visibleMask(a, b, view)
+        if not refine.any():
+            break
+        a, b = refineSegments(a, b, refine)
+        level += 1
+        yield level, toOutline(a, b)
+
+
+# just the finest outline
+def adaptiveOutline(sides, length, pixelSize, tolerance=1.0, depth=None, view=None, start=None):
+    points = None
+    for _, points in progressiveOutlines(sides, length, pixelSize, tolerance, depth, view, start):
+        pass
+    return points
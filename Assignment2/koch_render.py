@@ -0,0 +1,166 @@
+import argparse
+import os
+import sys
+import numpy as np
+
+from koch_geometry import kochPolygon, MAX_DEPTH
+from koch_lod import pixelSizeFor, progressiveOutlines
+
+# points formatted and written per piece of the SVG path
+SVG_CHUNK_POINTS = 1 << 16
+
+# points handed to ImageDraw.line per call
+PNG_CHUNK_POINTS = 1 << 18
+
+
+# scale the outline into a width x height canvas, keeping its aspect ratio
+# y is flipped, turtle y points up and image y points down
+# view (xmin, ymin, xmax, ymax) picks the world box shown, default the whole outline
+def fitToCanvas(points, width, height, margin=10, view=None):
+    if view is None:
+        low, high = points.min(axis=0), points.max(axis=0)
+    else:
+        low, high = np.array(view[:2], dtype=np.float64), np.array(view[2:], dtype=np.float64)
+    span = np.maximum(high - low, 1e-12)
+    scale = min((width - 2 * margin) / span[0], (height - 2 * margin) / span[1])
+    offset = (np.array([width, height]) - span * scale) / 2.0
+
+    pixels = (points - low) * scale + offset
+    pixels[:, 1] = height - pixels[:, 1]
+    return pixels
+
+
+# path data goes to the file a chunk at a time, the full string never exists
+def writeSvg(points, path, width=800, height=800, margin=10, stroke="black",
+             strokeWidth=1.0, fill="none", background=None, view=None):
+    pixels = fitToCanvas(points, width, height, margin, view)
+
+    with open(path, "w") as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                f'viewBox="0 0 {width} {height}">\n')
+        if background:
+            f.write(f'<rect width="100%" height="100%" fill="{background}"/>\n')
+        f.write(f'<path fill="{fill}" stroke="{stroke}" stroke-width="{strokeWidth}" '
+                f'stroke-linejoin="round" d="M')
+
+        for start in range(0, len(pixels), SVG_CHUNK_POINTS):
+            chunk = np.round(pixels[start:start + SVG_CHUNK_POINTS], 2).ravel().tolist()
+            f.write(" ".join(map(repr, chunk)))
+            f.write(" ")
+        f.write('Z"/>\n</svg>\n')
+
+
+def renderPng(points, width=800, height=800, margin=10, stroke="black",
+              strokeWidth=1, background="white", view=None):
+    # only needed for PNG output
+    from PIL import Image, ImageDraw
+
+    pixels = fitToCanvas(points, width, height, margin, view)
+    image = Image.new("RGB", (width, height), background)
+    draw = ImageDraw.Draw(image)
+
+    # consecutive pieces share their end point so the line stays connected
+    for start in range(0, len(pixels) - 1, PNG_CHUNK_POINTS):
+        chunk = pixels[start:start + PNG_CHUNK_POINTS + 1]
+        draw.line(chunk.ravel().tolist(), fill=stroke, width=strokeWidth)
+    return image
+
+
+def writePng(points, path, **options):
+    renderPng(points, **options).save(path, "PNG")
+
+
+def writeImage(points, path, width, height, margin, stroke, strokeWidth, background, view=None):
+    if path.lower().endswith(".svg"):
+        writeSvg(points, path, width, height, margin, stroke, strokeWidth,
+                 background=background, view=view)
+    else:
+        writePng(points, path, width=width, height=height, margin=margin, stroke=stroke,
+                 strokeWidth=max(1, int(round(strokeWidth))), background=background or "white",
+                 view=view)
+
+
+# out.png -> out.L3.png
+def levelPath(path, level):
+    root, ext = os.path.splitext(path)
+    return f"{root}.L{level}{ext}"
+
+
+def parseView(text):
+    view = [float(v) for v in text.split(",")]
+    if len(view) != 4 or view[0] >= view[2] or view[1] >= view[3]:
+        raise ValueError(text)
+    return view
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the Koch polygon of A2.3.py to SVG or PNG.")
+    parser.add_argument("--sides", type=int, required=True)
+    parser.add_argument("--length", type=float, default=300.0)
+    parser.add_argument("--depth", type=int, default=None,
+                        help="recursion depth (with --adaptive an optional cap)")
+    parser.add_argument("-o", "--output", required=True, help="output file, .svg or .png")
+    parser.add_argument("--size", type=int, default=800, help="image width and height in pixels")
+    parser.add_argument("--margin", type=int, default=10)
+    parser.add_argument("--stroke", default="black")
+    parser.add_argument("--stroke-width", type=float, default=1.0)
+    parser.add_argument("--background", default=None, help="default: white for PNG, none for SVG")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="split segments only while longer than --tolerance pixels")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="adaptive: segment length in pixels where splitting stops")
+    parser.add_argument("--view", default=None, metavar="XMIN,YMIN,XMAX,YMAX",
+                        help="adaptive: world box to show, segments outside it are not split")
+    parser.add_argument("--progressive", action="store_true",
+                        help="adaptive: also write every coarser level as NAME.L<level>.EXT")
+    args = parser.parse_args(argv)
+
+    if args.sides < 3:
+        parser.error("a polygon must have at least 3 sides")
+    if args.length <= 0:
+        parser.error("side length must be greater than zero")
+    if args.depth is None and not args.adaptive:
+        parser.error("--depth is required unless --adaptive is given")
+    if args.depth is not None and args.depth < 0:
+        parser.error("recursion depth cannot be negative")
+    # adaptive outlines stop by themselves, see koch_lod.MAX_LEVELS
+    if not args.adaptive and args.depth > MAX_DEPTH:
+        parser.error(f"recursion depth too large, use {MAX_DEPTH} or less (or --adaptive)")
+    if args.size <= 2 * args.margin:
+        parser.error("--size must be larger than twice the margin")
+    if (args.view or args.progressive) and not args.adaptive:
+        parser.error("--view and --progressive need --adaptive")
+    if args.tolerance <= 0:
+        parser.error("--tolerance must be greater than zero")
+
+    view = None
+    if args.view:
+        try:
+            view = parseView(args.view)
+        except ValueError:
+            parser.error("--view takes four numbers XMIN,YMIN,XMAX,YMAX with XMIN < XMAX, YMIN < YMAX")
+
+    try:
+        if not args.adaptive:
+            points = kochPolygon(args.sides, args.length, args.depth)
+            writeImage(points, args.output, args.size, args.size, args.margin, args.stroke,
+                       args.stroke_width, args.background)
+            return 0
+
+        pixelSize = pixelSizeFor(args.sides, args.length, args.size, view, margin=args.margin)
+        points = None
+        for level, points in progressiveOutlines(args.sides, args.length, pixelSize,
+                                                 args.tolerance, args.depth, view):
+            if args.progressive:
+                writeImage(points, levelPath(args.output, level), args.size, args.size,
+                           args.margin, args.stroke, args.stroke_width, args.background, view)
+        writeImage(points, args.output, args.size, args.size, args.margin, args.stroke,
+                   args.stroke_width, args.background, view)
+    except (OSError, ValueError) as e:
+        print(f"Could not write {args.output}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
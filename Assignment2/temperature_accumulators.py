@@ -0,0 +1,204 @@
+import os
+import numpy as np
+import pandas as pd
+
+from temperature_cache import YearFileCache, CACHE_DIR_NAME
+from temperature_data import MONTH_COLUMNS, COLUMN_DTYPES, listYearFiles
+from temperature_stats import SEASON_MONTHS, groupedMoments, statisticsFrame
+from temperature_trace import NULL_TRACER, NULL_SPAN
+
+
+# count, mean, M2, min and max for a sorted set of keys
+# two tables merge with Chan's parallel update, so partial results from
+# different files, workers or days combine into the same answer
+class MomentTable:
+    FIELDS = ["count", "mean", "m2", "min", "max"]
+
+    def __init__(self, keys=None, count=None, mean=None, m2=None, minimum=None, maximum=None):
+        self.keys = np.zeros(0, dtype=str) if keys is None else np.asarray(keys, dtype=str)
+        size = len(self.keys)
+        self.count = np.zeros(size, dtype=np.int64) if count is None else np.asarray(count, dtype=np.int64)
+        self.mean = np.zeros(size) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.m2 = np.zeros(size) if m2 is None else np.asarray(m2, dtype=np.float64)
+        self.min = np.full(size, np.inf) if minimum is None else np.asarray(minimum, dtype=np.float64)
+        self.max = np.full(size, -np.inf) if maximum is None else np.asarray(maximum, dtype=np.float64)
+
+    def merge(self, other):
+        if len(other.keys) == 0:
+            return self
+        if len(self.keys) == 0:
+            return other
+
+        keys = np.union1d(self.keys, other.keys)
+        merged = MomentTable(keys)
+        mine = np.searchsorted(keys, self.keys)
+        theirs = np.searchsorted(keys, other.keys)
+
+        merged.count[mine] = self.count
+        merged.mean[mine] = self.mean
+        merged.m2[mine] = self.m2
+        merged.min[mine] = self.min
+        merged.max[mine] = self.max
+
+        countA = merged.count[theirs].astype(np.float64)
+        countB = other.count.astype(np.float64)
+        total = countA + countB
+        delta = other.mean - merged.mean[theirs]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(total > 0, countB / total, 0.0)
+
+        merged.mean[theirs] = merged.mean[theirs] + delta * share
+        merged.m2[theirs] = merged.m2[theirs] + other.m2 + delta * delta * countA * share
+        merged.count[theirs] = merged.count[theirs] + other.count
+        merged.min[theirs] = np.minimum(merged.min[theirs], other.min)
+        merged.max[theirs] = np.maximum(merged.max[theirs], other.max)
+        return merged
+
+    def toArrays(self, prefix):
+        arrays = {f"{prefix}keys": self.keys}
+        for field in self.FIELDS:
+            arrays[prefix + field] = getattr(self, field)
+        return arrays
+
+    @classmethod
+    def fromArrays(cls, arrays, prefix):
+        return cls(arrays[f"{prefix}keys"], *[arrays[prefix + f] for f in cls.FIELDS])
+
+
+# running totals behind the three reports, updated one batch of rows
+# at a time so the rows can be thrown away afterwards
+class TemperatureAccumulator:
+    def __init__(self, stations=None, seasons=None):
+        self.stations = stations or MomentTable()
+        self.seasons = seasons or MomentTable()
+
+    # stationNames: one per row, values: (rows, 12) month block
+    def addRows(self, stationNames, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.stations = self.stations.merge(MomentTable(*groupedMoments(stationNames, values)))
+
+        seasonNames = []
+        stats = []
+        for season, columns in SEASON_MONTHS.items():
+            block = values[:, columns]
+            block = block[~np.isnan(block)]
+            if len(block) == 0:
+                continue
+            mean = block.mean()
+            seasonNames.append(season)
+            stats.append((len(block), mean, ((block - mean) ** 2).sum(), block.min(), block.max()))
+
+        if seasonNames:
+            order = np.argsort(seasonNames)
+            columns = list(zip(*[stats[i] for i in order]))
+            self.seasons = self.seasons.merge(
+                MomentTable(np.asarray(seasonNames)[order], *columns))
+
+    def addFrame(self, frame):
+        self.addRows(frame["STATION_NAME"], frame[MONTH_COLUMNS].to_numpy(dtype=np.float64))
+
+    def merge(self, other):
+        return TemperatureAccumulator(self.stations.merge(other.stations),
+                                      self.seasons.merge(other.seasons))
+
+    def isEmpty(self):
+        return len(self.stations.keys) == 0
+
+    def seasonalAverages(self):
+        averages = {}
+        for season in SEASON_MONTHS:
+            i = np.searchsorted(self.seasons.keys, season)
+            if i < len(self.seasons.keys) and self.seasons.keys[i] == season:
+                averages[season] = float(self.seasons.mean[i])
+        return averages
+
+    def stationStatistics(self):
+        s = self.stations
+        return statisticsFrame(s.keys, s.count, s.m2, s.min, s.max)
+
+    def toArrays(self):
+        arrays = self.stations.toArrays("station_")
+        arrays.update(self.seasons.toArrays("season_"))
+        return arrays
+
+    @classmethod
+    def fromArrays(cls, arrays):
+        return cls(MomentTable.fromArrays(arrays, "station_"),
+                   MomentTable.fromArrays(arrays, "season_"))
+
+    # partial results are plain .npz files
+    def save(self, path):
+        np.savez(path, **self.toArrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls.fromArrays(dict(arrays))
+
+
+# rows parsed at a time when a year file is not cached
+CHUNK_ROWS = 100000
+
+
+class MissingColumnError(ValueError):
+    pass
+
+
+def checkColumns(frame):
+    if "STATION_NAME" not in frame.columns:
+        raise MissingColumnError("STATION_NAME column missing in data.")
+    for month in MONTH_COLUMNS:
+        if month not in frame.columns:
+            raise MissingColumnError(f"Missing month column: {month}")
+
+
+def accumulateFile(filePath, chunkRows=CHUNK_ROWS, span=NULL_SPAN):
+    accumulator = TemperatureAccumulator()
+    for chunk in pd.read_csv(filePath, dtype=COLUMN_DTYPES, chunksize=chunkRows):
+        checkColumns(chunk)
+        accumulator.addFrame(chunk)
+        span.add(rows=len(chunk))
+    return accumulator
+
+
+# one year file at a time, only the accumulators stay in memory
+# each file's accumulator is cached, so unchanged years are not read again
+# raises MissingColumnError when a file lacks a required column
+def accumulateTemperatures(folderPath, useCache=True, cacheDir=None, chunkRows=CHUNK_ROWS,
+                           tracer=NULL_TRACER):
+    cache = None
+    if useCache:
+        cache = YearFileCache(cacheDir or os.path.join(folderPath, CACHE_DIR_NAME))
+
+    total = TemperatureAccumulator()
+    filePaths = []
+
+    for fileName in listYearFiles(folderPath):
+        filePath = os.path.join(folderPath, fileName)
+        filePaths.append(filePath)
+
+        with tracer.span("accumulate-file", file=fileName) as span:
+            arrays = cache.loadArrays(filePath, "aggregate") if cache is not None else None
+            if arrays is not None:
+                yearAccumulator = TemperatureAccumulator.fromArrays(arrays)
+                span.add(cached=1)
+            else:
+                try:
+                    if tracer.enabled:
+                        span.add(bytes=os.path.getsize(filePath))
+                    yearAccumulator = accumulateFile(filePath, chunkRows, span)
+                except MissingColumnError:
+                    raise
+                except Exception:
+                    print(f"Could not read file: {fileName}")
+                    continue
+                if cache is not None:
+                    cache.storeArrays(filePath, "aggregate", yearAccumulator.toArrays())
+
+        total = total.merge(yearAccumulator)
+
+    if cache is not None:
+        cache.prune(filePaths)
+        cache.save()
+
+    return total
@@ -0,0 +1,185 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from temperature_data import loadTemperatures, MONTH_COLUMNS
+from temperature_stats import seasonalAverages, stationStatistics, writeReports
+from temperature_accumulators import accumulateTemperatures
+from temperature_generator import generateYearFiles
+
+MODES = ["wide", "long", "stream"]
+
+
+# A2.2.py can't be imported by name, load it from next to this file
+def loadAnalysisScript():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "A2.2.py")
+    spec = importlib.util.spec_from_file_location("analysis_script", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def peakRssKb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# phases: name -> seconds, peaks: name -> process peak RSS (KB) so far,
+# taken when the stage ends, so a jump shows which stage raised it
+def timeStage(phases, peaks, name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    phases[name] = time.perf_counter() - start
+    peaks[name] = peakRssKb()
+    return result
+
+
+def wideStages(phases, peaks, folderPath, reportDir):
+    data = timeStage(phases, peaks, "ingest", loadTemperatures, folderPath, False)
+    values = timeStage(phases, peaks, "reshape",
+                       lambda: data[MONTH_COLUMNS].to_numpy(dtype="float64"))
+    seasonalAvg, stats = timeStage(phases, peaks, "groupby", lambda: (
+        seasonalAverages(values), stationStatistics(data["STATION_NAME"], values)))
+    timeStage(phases, peaks, "write", writeReports, seasonalAvg, stats, reportDir)
+
+
+def longStages(phases, peaks, folderPath, reportDir):
+    script = loadAnalysisScript()
+    data = timeStage(phases, peaks, "ingest", loadTemperatures, folderPath, False)
+    longData = timeStage(phases, peaks, "reshape", script.meltLong, data)
+    seasonalAvg, stats = timeStage(phases, peaks, "groupby", script.aggregateLong, longData)
+    timeStage(phases, peaks, "write", writeReports, seasonalAvg, stats, reportDir)
+
+
+# reading and grouping are one pass here, so ingest covers both
+def streamStages(phases, peaks, folderPath, reportDir):
+    accumulator = timeStage(phases, peaks, "ingest", accumulateTemperatures, folderPath, False)
+    seasonalAvg, stats = timeStage(phases, peaks, "groupby", lambda: (
+        accumulator.seasonalAverages(), accumulator.stationStatistics()))
+    timeStage(phases, peaks, "write", writeReports, seasonalAvg, stats, reportDir)
+
+
+STAGES = {"wide": wideStages, "long": longStages, "stream": streamStages}
+
+
+# runs in a fresh process so the peak RSS belongs to this case only
+def runCase(mode, folderPath, reportDir):
+    phases = {}
+    peaks = {}
+    start = time.perf_counter()
+    STAGES[mode](phases, peaks, folderPath, reportDir)
+    return time.perf_counter() - start, phases, peaks
+
+
+def folderBytes(folderPath):
+    return sum(os.path.getsize(os.path.join(folderPath, name)) for name in os.listdir(folderPath))
+
+
+def runBenchmarks(stationCounts, yearCounts, modes, workDir, nanRate=0.0, log=None):
+    context = multiprocessing.get_context("spawn")
+    cases = []
+
+    for stations in stationCounts:
+        for years in yearCounts:
+            folderPath = os.path.join(workDir, f"data_{stations}_{years}")
+            start = time.perf_counter()
+            generateYearFiles(folderPath, stations, years, nanRate=nanRate)
+            generateSeconds = time.perf_counter() - start
+            inputBytes = folderBytes(folderPath)
+
+            for mode in modes:
+                reportDir = os.path.join(workDir, f"reports_{mode}")
+                os.makedirs(reportDir, exist_ok=True)
+                case = {
+                    "stations": stations,
+                    "years": years,
+                    "mode": mode,
+                    "rows": stations * years,
+                    "inputBytes": inputBytes,
+                    "generateSeconds": generateSeconds,
+                }
+
+                try:
+                    with ProcessPoolExecutor(1, mp_context=context) as pool:
+                        wall, phases, peaks = pool.submit(
+                            runCase, mode, folderPath, reportDir).result()
+                    case.update({
+                        "wallSeconds": wall,
+                        "phaseSeconds": phases,
+                        "phasePeakRssKb": peaks,
+                        "peakRssKb": max(peaks.values()) if peaks else None,
+                    })
+                except (BrokenProcessPool, MemoryError) as e:
+                    # usually the long mode running out of memory at the large sizes
+                    case["error"] = f"{type(e).__name__}: {e}"
+
+                cases.append(case)
+                if log is not None:
+                    if "error" in case:
+                        print(f"{stations:>8} x {years:<4} {mode:7} failed: {case['error']}", file=log)
+                    else:
+                        stages = ", ".join(f"{name} {sec:.2f}s" for name, sec in case["phaseSeconds"].items())
+                        print(f"{stations:>8} x {years:<4} {mode:7} {case['wallSeconds']:.2f}s "
+                              f"({stages}) peak {case['peakRssKb'] / 1024:.0f} MB", file=log)
+
+            shutil.rmtree(folderPath)
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        "nanRate": nanRate,
+        "cases": cases,
+    }
+
+
+def parseCounts(text):
+    return [int(v.replace("k", "000")) for v in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the A2.2 analysis modes.")
+    parser.add_argument("--stations", default="1k,10k,100k",
+                        help="comma separated station counts")
+    parser.add_argument("--years", default="20,100", help="comma separated year spans")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma separated modes")
+    parser.add_argument("--nan-rate", type=float, default=0.02,
+                        help="fraction of month values left empty in the generated files")
+    parser.add_argument("--work-dir", default=None,
+                        help="where the files are generated (default: a temp dir)")
+    parser.add_argument("-o", "--output", default="-", help="JSON report path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    modes = args.modes.split(",")
+    for name in modes:
+        if name not in MODES:
+            parser.error(f"unknown mode: {name}")
+    try:
+        stationCounts = parseCounts(args.stations)
+        yearCounts = parseCounts(args.years)
+    except ValueError:
+        parser.error("--stations and --years take comma separated whole numbers, e.g. 1k,10k")
+
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as workDir:
+        report = runBenchmarks(stationCounts, yearCounts, modes, workDir, args.nan_rate, log=sys.stderr)
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
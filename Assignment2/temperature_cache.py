@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+# default cache folder, created inside the temperatures folder
+CACHE_DIR_NAME = ".cache"
+
+# bumped whenever the stored layout changes, older caches are dropped
+CACHE_VERSION = 4
+
+
+# parsed year files stored as .npz column arrays (name -> numpy array)
+# an entry is only used while the csv keeps the same path, size and mtime
+class YearFileCache:
+    def __init__(self, cacheDir):
+        self.cacheDir = cacheDir
+        self.indexPath = os.path.join(cacheDir, "index.json")
+        self.index = {}
+        self.changed = False
+
+        try:
+            with open(self.indexPath, "r") as f:
+                stored = json.load(f)
+            if stored.get("version") == CACHE_VERSION:
+                self.index = stored["files"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            self.index = {}
+
+    @staticmethod
+    def fileKey(filePath):
+        st = os.stat(filePath)
+        return {"size": st.st_size, "mtime": st.st_mtime_ns}
+
+    # each cached file can hold several kinds of arrays: the parsed
+    # "columns" and the per-year "aggregate" used by the streaming mode
+    def dataPath(self, filePath, kind):
+        digest = hashlib.sha1(os.path.abspath(filePath).encode()).hexdigest()[:16]
+        return os.path.join(self.cacheDir, f"{digest}.{kind}.npz")
+
+    def loadArrays(self, filePath, kind):
+        entry = self.index.get(os.path.abspath(filePath))
+        if entry is None or entry["key"] != self.fileKey(filePath) or kind not in entry:
+            return None
+
+        try:
+            with np.load(self.dataPath(filePath, kind), allow_pickle=False) as arrays:
+                result = {}
+                for i, name in enumerate(entry[kind]):
+                    result[name] = arrays[f"arr_{i}"]
+        except (OSError, KeyError, ValueError):
+            return None
+
+        return result
+
+    # arrays must be plain numpy arrays (no object dtype)
+    def storeArrays(self, filePath, kind, arrays):
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            np.savez(self.dataPath(filePath, kind), *arrays.values())
+        except OSError:
+            return
+
+        # a changed file invalidates every kind stored for it
+        key = self.fileKey(filePath)
+        entry = self.index.get(os.path.abspath(filePath))
+        if entry is None or entry["key"] != key:
+            entry = {"key": key}
+        entry[kind] = list(arrays)
+        self.index[os.path.abspath(filePath)] = entry
+        self.changed = True
+
+    def load(self, filePath):
+        return self.loadArrays(filePath, "columns")
+
+    def store(self, filePath, columns):
+        self.storeArrays(filePath, "columns", columns)
+
+    # forget files that are no longer in the folder
+    def prune(self, filePaths):
+        keep = {os.path.abspath(p) for p in filePaths}
+        for path in list(self.index):
+            if path not in keep:
+                for kind in self.index[path]:
+                    if kind != "key":
+                        try:
+                            os.remove(self.dataPath(path, kind))
+                        except OSError:
+                            pass
+                del self.index[path]
+                self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            tmpPath = self.indexPath + ".tmp"
+            with open(tmpPath, "w") as f:
+                json.dump({"version": CACHE_VERSION, "files": self.index}, f)
+            os.replace(tmpPath, self.indexPath)
+            self.changed = False
+        except OSError:
+            pass
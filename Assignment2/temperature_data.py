@@ -0,0 +1,156 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from temperature_cache import YearFileCache, CACHE_DIR_NAME
+from temperature_trace import NULL_TRACER
+
+MONTH_COLUMNS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+# fixed schema for the station files, anything else is left to pandas
+# STN_ID isn't used and may be blank, so pandas picks its type
+COLUMN_DTYPES = {
+    "STATION_NAME": str,
+    "LAT": np.float32,
+    "LON": np.float32,
+}
+for month in MONTH_COLUMNS:
+    COLUMN_DTYPES[month] = np.float32
+
+# year of each row, taken from the file name since the files don't carry it
+# files without a year in their name get YEAR_UNKNOWN
+YEAR_COLUMN = "Year"
+YEAR_DTYPE = np.int16
+YEAR_UNKNOWN = -1
+
+
+def listYearFiles(folderPath):
+    return sorted(name for name in os.listdir(folderPath) if name.endswith(".csv"))
+
+
+# stations_group_1986.csv -> 1986, None when the name has no year
+def yearFromFileName(fileName):
+    match = re.search(r"(\d{4})\D*$", fileName)
+    return int(match.group(1)) if match else None
+
+
+# stands in for a missing text value in the parsed arrays
+# read_csv never yields an empty string, so it can't clash with real text
+MISSING_TEXT = ""
+
+
+# parse one csv into name -> numpy array, None if it can't be read
+# text columns become fixed width unicode arrays so they can be cached,
+# missing values in them become MISSING_TEXT
+def readYearFile(filePath):
+    try:
+        df = pd.read_csv(filePath, dtype=COLUMN_DTYPES)
+    except Exception:
+        return None
+
+    columns = {}
+    for name in df.columns:
+        values = df[name].to_numpy()
+        if values.dtype == object:
+            values = np.where(pd.isna(values), MISSING_TEXT, values).astype(str)
+        columns[str(name)] = values
+    return columns
+
+
+def yearColumn(fileName, rows):
+    year = yearFromFileName(fileName)
+    return np.full(rows, YEAR_UNKNOWN if year is None else year, dtype=YEAR_DTYPE)
+
+
+# one concatenation per column across all files, then a single frame
+# STATION_NAME becomes categorical, months stay float32
+def assembleColumns(columnsPerFile):
+    names = []
+    for columns in columnsPerFile:
+        for name in columns:
+            if name not in names:
+                names.append(name)
+
+    combined = {}
+    for name in names:
+        present = next(c[name] for c in columnsPerFile if name in c)
+        parts = []
+        for columns in columnsPerFile:
+            if name in columns:
+                parts.append(columns[name])
+            else:
+                # column missing from this file, fill like pd.concat would
+                rows = len(next(iter(columns.values()))) if columns else 0
+                if present.dtype.kind == "U":
+                    parts.append(np.full(rows, None, dtype=object))
+                else:
+                    parts.append(np.full(rows, np.nan, dtype=np.float32))
+
+        values = np.concatenate(parts)
+        if values.dtype.kind in "UO":
+            # missing text stays NaN, not a category of its own
+            values = np.where(values == MISSING_TEXT, None, values)
+            values = pd.Categorical(values)
+        combined[name] = values
+
+    return pd.DataFrame(combined)
+
+
+# read every csv in the folder into one frame
+# unchanged files come from the cache, the rest are parsed concurrently
+def loadTemperatures(folderPath, useCache=True, cacheDir=None, workers=None, tracer=NULL_TRACER):
+    cache = None
+    if useCache:
+        cache = YearFileCache(cacheDir or os.path.join(folderPath, CACHE_DIR_NAME))
+
+    fileNames = listYearFiles(folderPath)
+    filePaths = [os.path.join(folderPath, name) for name in fileNames]
+
+    columnsPerFile = [None] * len(filePaths)
+    toParse = []
+    with tracer.span("cache-load", files=len(filePaths)) as span:
+        for i, filePath in enumerate(filePaths):
+            if cache is not None:
+                columnsPerFile[i] = cache.load(filePath)
+            if columnsPerFile[i] is None:
+                toParse.append(i)
+        span.add(hits=len(filePaths) - len(toParse))
+
+    if toParse:
+        with tracer.span("parse-csv", files=len(toParse)) as span:
+            if tracer.enabled:
+                span.add(bytes=sum(os.path.getsize(filePaths[i]) for i in toParse))
+            with ThreadPoolExecutor(workers) as pool:
+                parsed = pool.map(readYearFile, [filePaths[i] for i in toParse])
+                for i, columns in zip(toParse, parsed):
+                    if columns is None:
+                        print(f"Could not read file: {fileNames[i]}")
+                        continue
+                    columnsPerFile[i] = columns
+                    if cache is not None:
+                        cache.store(filePaths[i], columns)
+
+    if cache is not None:
+        with tracer.span("cache-save"):
+            cache.prune(filePaths)
+            cache.save()
+
+    # the year is added after caching, cached entries stay as parsed
+    for i, columns in enumerate(columnsPerFile):
+        if columns is not None:
+            rows = len(next(iter(columns.values()))) if columns else 0
+            columnsPerFile[i] = dict(columns, **{YEAR_COLUMN: yearColumn(fileNames[i], rows)})
+
+    columnsPerFile = [c for c in columnsPerFile if c is not None]
+    if len(columnsPerFile) == 0:
+        return None
+
+    with tracer.span("assemble") as span:
+        data = assembleColumns(columnsPerFile)
+        span.add(rows=len(data))
+    return data
@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from temperature_data import MONTH_COLUMNS
+
+# rough mainland Australia box the stations are scattered over
+LAT_RANGE = (-43.0, -11.0)
+LON_RANGE = (113.0, 154.0)
+
+
+# fixed per-station properties, drawn once so every year shares them
+def stationTable(stations, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(*LAT_RANGE, stations)
+    lon = rng.uniform(*LON_RANGE, stations)
+
+    # warmer and less seasonal towards the tropics, like the real files
+    southward = -lat - 10.0
+    return pd.DataFrame({
+        "STATION_NAME": [f"SYNTH-STATION-{i:06d}" for i in range(stations)],
+        "STN_ID": np.arange(100000, 100000 + stations, dtype=np.int32),
+        "LAT": np.round(lat, 2),
+        "LON": np.round(lon, 2),
+        "mean": 34.0 - 0.45 * southward + rng.normal(0.0, 1.5, stations),
+        "amplitude": 2.5 + 0.2 * southward + rng.normal(0.0, 0.5, stations),
+        "trend": rng.normal(0.2, 0.15, stations),
+    })
+
+
+# one year's rows: annual mean + seasonal cosine peaking in January
+# + the station's warming trend (degrees per decade) + weather noise
+def yearFrame(table, year, startYear, rng, nanRate=0.0, dropRate=0.0,
+              amplitudeScale=1.0, noise=1.0):
+    months = np.arange(12)
+    seasonal = np.cos(2.0 * np.pi * months / 12.0)
+    stations = len(table)
+
+    values = (table["mean"].to_numpy()[:, None]
+              + amplitudeScale * table["amplitude"].to_numpy()[:, None] * seasonal[None, :]
+              + table["trend"].to_numpy()[:, None] * (year - startYear) / 10.0
+              + rng.normal(0.0, noise, (stations, 12)))
+    values = np.round(values, 2).astype(np.float32)
+    if nanRate > 0:
+        values[rng.random(values.shape) < nanRate] = np.nan
+
+    frame = table[["STATION_NAME", "STN_ID", "LAT", "LON"]].copy()
+    frame[MONTH_COLUMNS] = values
+    if dropRate > 0:
+        frame = frame[rng.random(stations) >= dropRate]
+    return frame
+
+
+# writes stations_group_YYYY.csv for every year into folderPath
+# returns the paths written
+def generateYearFiles(folderPath, stations, years, startYear=1986, nanRate=0.0,
+                      dropRate=0.0, amplitudeScale=1.0, noise=1.0, seed=0):
+    os.makedirs(folderPath, exist_ok=True)
+    table = stationTable(stations, seed)
+    rng = np.random.default_rng(seed + 1)
+
+    paths = []
+    for year in range(startYear, startYear + years):
+        frame = yearFrame(table, year, startYear, rng, nanRate, dropRate, amplitudeScale, noise)
+        path = os.path.join(folderPath, f"stations_group_{year}.csv")
+        frame.to_csv(path, index=False, float_format="%.2f")
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic stations_group_YYYY.csv files.")
+    parser.add_argument("folder", help="output folder")
+    parser.add_argument("--stations", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--start-year", type=int, default=1986)
+    parser.add_argument("--nan-rate", type=float, default=0.0,
+                        help="fraction of month values left empty")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="fraction of stations missing from each year's file")
+    parser.add_argument("--amplitude", type=float, default=1.0,
+                        help="scale of the summer/winter swing")
+    parser.add_argument("--noise", type=float, default=1.0,
+                        help="std of the month to month noise in degrees")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.stations < 1 or args.years < 1:
+        parser.error("--stations and --years must be at least 1")
+    if not (0.0 <= args.nan_rate < 1.0 and 0.0 <= args.drop_rate < 1.0):
+        parser.error("--nan-rate and --drop-rate must be in [0, 1)")
+
+    paths = generateYearFiles(args.folder, args.stations, args.years, args.start_year,
+                              args.nan_rate, args.drop_rate, args.amplitude, args.noise, args.seed)
+    print(f"Wrote {len(paths)} files with {args.stations} stations to {args.folder}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
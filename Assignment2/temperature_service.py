@@ -0,0 +1,426 @@
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+from temperature_cache import YearFileCache, CACHE_DIR_NAME
+from temperature_data import MONTH_COLUMNS, MISSING_TEXT, listYearFiles, readYearFile, yearFromFileName
+from temperature_stats import SEASON_MONTHS, groupedMoments
+from temperature_spatial import StationIndex, regionalSeasonalMeans
+
+SEASONS = list(SEASON_MONTHS)
+
+
+# everything the queries need, precomputed into arrays
+# yearData: year -> column arrays of that year's file
+# cells are (station, year); a station listed twice in a year is averaged
+# rows without a station name are left out
+class TemperatureIndex:
+    def __init__(self, yearData):
+        self.years = np.array(sorted(yearData), dtype=np.int32)
+        names = [np.asarray(yearData[y]["STATION_NAME"], dtype=str) for y in self.years]
+        named = [n != MISSING_TEXT for n in names]
+        names = [n[keep] for n, keep in zip(names, named)]
+        self.stations = np.unique(np.concatenate(names)) if names else np.zeros(0, dtype=str)
+        self.stationIndex = {name: i for i, name in enumerate(self.stations)}
+        self.yearIndex = {int(y): i for i, y in enumerate(self.years)}
+
+        shape = (len(self.stations), len(self.years))
+        latSum = np.zeros(len(self.stations))
+        lonSum = np.zeros(len(self.stations))
+        located = np.zeros(len(self.stations), dtype=np.int64)
+        sums = np.zeros(shape + (12,))
+        counts = np.zeros(shape + (12,), dtype=np.int64)
+        self.yearMax = np.full(shape, np.nan)
+        self.yearMin = np.full(shape, np.nan)
+
+        allNames = []
+        allValues = []
+        for yi, year in enumerate(self.years):
+            columns = yearData[year]
+            values = np.stack([columns[m] for m in MONTH_COLUMNS], axis=1).astype(np.float64)[named[yi]]
+            rows = np.searchsorted(self.stations, names[yi])
+            valid = ~np.isnan(values)
+
+            np.add.at(sums[:, yi], rows, np.where(valid, values, 0.0))
+            np.add.at(counts[:, yi], rows, valid)
+            np.fmax.at(self.yearMax[:, yi], rows, np.fmax.reduce(values, axis=1))
+            np.fmin.at(self.yearMin[:, yi], rows, np.fmin.reduce(values, axis=1))
+
+            if "LAT" in columns and "LON" in columns:
+                lat = np.asarray(columns["LAT"], dtype=np.float64)[named[yi]]
+                lon = np.asarray(columns["LON"], dtype=np.float64)[named[yi]]
+                known = ~(np.isnan(lat) | np.isnan(lon))
+                np.add.at(latSum, rows[known], lat[known])
+                np.add.at(lonSum, rows[known], lon[known])
+                np.add.at(located, rows[known], 1)
+
+            allNames.append(names[yi])
+            allValues.append(values)
+
+        # season totals per (station, year, season)
+        seasonSum = np.stack([sums[:, :, m].sum(axis=2) for m in SEASON_MONTHS.values()], axis=2)
+        seasonCount = np.stack([counts[:, :, m].sum(axis=2) for m in SEASON_MONTHS.values()], axis=2)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.yearSeasonMean = seasonSum / seasonCount
+            self.stationSeasonMean = seasonSum.sum(axis=1) / seasonCount.sum(axis=1)
+            self.seasonMean = seasonSum.sum(axis=(0, 1)) / seasonCount.sum(axis=(0, 1))
+            self.yearAllSeasonMean = seasonSum.sum(axis=0) / seasonCount.sum(axis=0)
+
+        # spatial index over the stations that have coordinates
+        # spatialRows maps a row of the spatial index back to a station row
+        self.spatialRows = np.flatnonzero(located > 0)
+        self.spatial = StationIndex(self.stations[self.spatialRows],
+                                    latSum[self.spatialRows] / located[self.spatialRows],
+                                    lonSum[self.spatialRows] / located[self.spatialRows])
+        self.spatialSeasonSum = seasonSum.sum(axis=1)[self.spatialRows]
+        self.spatialSeasonCount = seasonCount.sum(axis=1)[self.spatialRows]
+
+        # whole-history station statistics, same numbers as the reports
+        self.stationMax = np.full(len(self.stations), np.nan)
+        self.stationMin = np.full(len(self.stations), np.nan)
+        self.stationStd = np.full(len(self.stations), np.nan)
+        if allNames:
+            found, count, mean, m2, minTemp, maxTemp = groupedMoments(
+                np.concatenate(allNames), np.concatenate(allValues))
+            rows = np.searchsorted(self.stations, found)
+            self.stationMax[rows] = maxTemp
+            self.stationMin[rows] = minTemp
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self.stationStd[rows] = np.where(count > 1, np.sqrt(m2 / (count - 1)), np.nan)
+
+        # stations ordered by std, NaN last
+        stdKey = np.where(np.isnan(self.stationStd), np.inf, self.stationStd)
+        self.stableOrder = np.argsort(stdKey, kind="stable")
+        stdKey = np.where(np.isnan(self.stationStd), np.inf, -self.stationStd)
+        self.variableOrder = np.argsort(stdKey, kind="stable")
+
+    def stationRow(self, name):
+        if name not in self.stationIndex:
+            raise KeyError(f"Unknown station: {name}")
+        return self.stationIndex[name]
+
+    def yearColumn(self, year):
+        if year not in self.yearIndex:
+            raise KeyError(f"No data for year: {year}")
+        return self.yearIndex[year]
+
+
+def toJsonNumber(value):
+    value = float(value)
+    return None if np.isnan(value) else round(value, 3)
+
+
+def seasonMeans(values):
+    return {season: toJsonNumber(v) for season, v in zip(SEASONS, values)}
+
+
+# loads the folder once and keeps the index current
+# only new or changed year files are read again on reload, but any change
+# rebuilds the whole index from every year held in memory
+# a file that fails to load drops its year and is retried on the next reload
+class TemperatureService:
+    def __init__(self, folderPath, useCache=True):
+        self.folderPath = folderPath
+        self.useCache = useCache
+        self.fileKeys = {}
+        self.yearData = {}
+        self.lock = threading.Lock()
+        self.index = TemperatureIndex({})
+        self.loadedAt = None
+        self.reload()
+
+    # returns the years that were (re)loaded or dropped
+    def reload(self):
+        with self.lock:
+            cache = None
+            if self.useCache:
+                cache = YearFileCache(os.path.join(self.folderPath, CACHE_DIR_NAME))
+
+            seen = {}
+            changedYears = []
+            for fileName in listYearFiles(self.folderPath):
+                year = yearFromFileName(fileName)
+                if year is None:
+                    continue
+                filePath = os.path.join(self.folderPath, fileName)
+                key = YearFileCache.fileKey(filePath)
+                if self.fileKeys.get(filePath) == key:
+                    seen[filePath] = key
+                    continue
+
+                columns = cache.load(filePath) if cache is not None else None
+                if columns is None:
+                    columns = readYearFile(filePath)
+                    if columns is not None and cache is not None:
+                        cache.store(filePath, columns)
+
+                if columns is None:
+                    print(f"Could not read file: {fileName}")
+                elif "STATION_NAME" not in columns or any(m not in columns for m in MONTH_COLUMNS):
+                    print(f"Missing columns in file: {fileName}")
+                    columns = None
+
+                if columns is None:
+                    # the old data no longer matches the file
+                    if self.yearData.pop(year, None) is not None:
+                        changedYears.append(year)
+                    continue
+
+                self.yearData[year] = columns
+                seen[filePath] = key
+                changedYears.append(year)
+
+            # year files that disappeared
+            for filePath in set(self.fileKeys) - set(seen):
+                year = yearFromFileName(os.path.basename(filePath))
+                if self.yearData.pop(year, None) is not None:
+                    changedYears.append(year)
+
+            if cache is not None:
+                cache.save()
+
+            if changedYears or self.loadedAt is None:
+                # swap in a fresh index, readers keep using the old one meanwhile
+                self.index = TemperatureIndex(self.yearData)
+                self.loadedAt = time.time()
+            # only once the index is built, so a failed build is retried
+            self.fileKeys = seen
+            return sorted(changedYears)
+
+    def watch(self, interval):
+        def loop():
+            while True:
+                time.sleep(interval)
+                # a failed reload keeps the current index, the next poll retries
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"Reload failed: {e}")
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+    #  queries, each returns a JSON-ready dict
+    def summary(self):
+        index = self.index
+        return {
+            "stations": len(index.stations),
+            "years": [int(y) for y in index.years],
+            "seasonalMean": seasonMeans(index.seasonMean),
+            "loadedAt": self.loadedAt,
+        }
+
+    def stationList(self):
+        return {"stations": [str(s) for s in self.index.stations]}
+
+    def seasonalMean(self, station=None, year=None):
+        index = self.index
+        if station is None and year is None:
+            return {"seasonalMean": seasonMeans(index.seasonMean)}
+        if station is None:
+            return {"year": year, "seasonalMean": seasonMeans(index.yearAllSeasonMean[index.yearColumn(year)])}
+
+        row = index.stationRow(station)
+        if year is None:
+            return {"station": station, "seasonalMean": seasonMeans(index.stationSeasonMean[row])}
+        return {"station": station, "year": year,
+                "seasonalMean": seasonMeans(index.yearSeasonMean[row, index.yearColumn(year)])}
+
+    def topStations(self, n=10, stable=False):
+        index = self.index
+        order = index.stableOrder if stable else index.variableOrder
+        result = []
+        for row in order[:n]:
+            if np.isnan(index.stationStd[row]):
+                break
+            result.append({"station": str(index.stations[row]),
+                           "stdDev": toJsonNumber(index.stationStd[row])})
+        return {"stations": result}
+
+    def temperatureRange(self, station=None, year=None):
+        index = self.index
+        if station is None and year is None:
+            ranges = index.stationMax - index.stationMin
+            if np.isnan(ranges).all():
+                return {"station": None}
+            row = int(np.nanargmax(ranges))
+            maxTemp, minTemp = index.stationMax[row], index.stationMin[row]
+        elif station is None:
+            col = index.yearColumn(year)
+            ranges = index.yearMax[:, col] - index.yearMin[:, col]
+            if np.isnan(ranges).all():
+                return {"year": year, "station": None}
+            row = int(np.nanargmax(ranges))
+            maxTemp, minTemp = index.yearMax[row, col], index.yearMin[row, col]
+        else:
+            row = index.stationRow(station)
+            if year is None:
+                maxTemp, minTemp = index.stationMax[row], index.stationMin[row]
+            else:
+                col = index.yearColumn(year)
+                maxTemp, minTemp = index.yearMax[row, col], index.yearMin[row, col]
+
+        return {"station": str(index.stations[row]), "year": year,
+                "max": toJsonNumber(maxTemp), "min": toJsonNumber(minTemp),
+                "range": toJsonNumber(maxTemp - minTemp)}
+
+
+    # lat/lon may hold many points, every point is answered in one call
+    def nearestStations(self, lat, lon, k=5):
+        index = self.index
+        distances, rows = index.spatial.nearest(lat, lon, k)
+        points = []
+        for pointLat, pointLon, pointDist, pointRows in zip(lat, lon, distances, rows):
+            points.append({"lat": pointLat, "lon": pointLon, "stations": [
+                {"station": str(index.spatial.names[r]), "distanceKm": toJsonNumber(d)}
+                for d, r in zip(pointDist, pointRows)]})
+        return {"points": points}
+
+    # seasonal means over the stations within radiusKm of each point,
+    # or inside a lat/lon box when box is (minLat, maxLat, minLon, maxLon)
+    def regionalMean(self, lat=(), lon=(), radiusKm=None, box=None):
+        index = self.index
+        if box is not None:
+            groups = [index.spatial.inBox(*box)]
+        else:
+            groups = index.spatial.within(lat, lon, radiusKm)
+
+        means = regionalSeasonalMeans(groups, index.spatialSeasonSum, index.spatialSeasonCount)
+        regions = []
+        for group, values in zip(groups, means):
+            regions.append({"stations": len(group), "seasonalMean": seasonMeans(values)})
+
+        if box is not None:
+            regions[0]["box"] = list(box)
+        else:
+            for region, pointLat, pointLon in zip(regions, lat, lon):
+                region.update(lat=pointLat, lon=pointLon, radiusKm=radiusKm)
+        return {"regions": regions}
+
+
+# "1.5,2,3" -> [1.5, 2.0, 3.0], ValueError for nan or inf
+def parseFloats(text):
+    values = [float(v) for v in text.split(",")]
+    if not np.isfinite(values).all():
+        raise ValueError(text)
+    return values
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        service = self.service
+
+        try:
+            station = params.get("station")
+            year = int(params["year"]) if "year" in params else None
+            n = int(params.get("n", 10))
+            if n < 0:
+                self.sendJson(400, {"error": "n must not be negative"})
+                return
+
+            if url.path == "/":
+                body = service.summary()
+            elif url.path == "/stations":
+                body = service.stationList()
+            elif url.path == "/seasonal-mean":
+                body = service.seasonalMean(station, year)
+            elif url.path == "/top-variable":
+                body = service.topStations(n)
+            elif url.path == "/top-stable":
+                body = service.topStations(n, stable=True)
+            elif url.path == "/range":
+                body = service.temperatureRange(station, year)
+            elif url.path == "/nearest":
+                lat, lon = parseFloats(params["lat"]), parseFloats(params["lon"])
+                if len(lat) != len(lon):
+                    raise ValueError
+                k = int(params.get("k", 5))
+                if k < 1:
+                    self.sendJson(400, {"error": "k must be at least 1"})
+                    return
+                body = service.nearestStations(lat, lon, k)
+            elif url.path == "/region":
+                if "box" in params:
+                    box = parseFloats(params["box"])
+                    if len(box) != 4:
+                        raise ValueError
+                    body = service.regionalMean(box=box)
+                else:
+                    lat, lon = parseFloats(params["lat"]), parseFloats(params["lon"])
+                    if len(lat) != len(lon):
+                        raise ValueError
+                    radius, = parseFloats(params["radius"])
+                    if radius < 0:
+                        self.sendJson(400, {"error": "radius must not be negative"})
+                        return
+                    body = service.regionalMean(lat, lon, radius)
+            elif url.path == "/reload":
+                body = {"reloadedYears": service.reload()}
+            else:
+                self.sendJson(404, {"error": f"Unknown path: {url.path}"})
+                return
+        except KeyError as e:
+            if e.args[0] in ("lat", "lon", "radius"):
+                self.sendJson(400, {"error": f"Missing parameter: {e.args[0]}"})
+            else:
+                self.sendJson(404, {"error": str(e.args[0])})
+            return
+        except ValueError:
+            self.sendJson(400, {"error": "year, n and k must be whole numbers, "
+                                         "lat, lon, radius and box comma separated finite numbers"})
+            return
+
+        self.sendJson(200, body)
+
+    def sendJson(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve temperature queries over local HTTP/JSON.")
+    parser.add_argument("--folder", default="temperatures", help="folder with the year CSV files")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--poll", type=float, default=30.0,
+                        help="seconds between checks for new year files (0 to disable)")
+    parser.add_argument("--no-cache", action="store_true", help="parse every file again")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.folder):
+        print("Temperatures folder not found.")
+        return
+
+    service = TemperatureService(args.folder, not args.no_cache)
+    if args.poll > 0:
+        service.watch(args.poll)
+
+    QueryHandler.service = service
+    server = ThreadingHTTPServer((args.host, args.port), QueryHandler)
+    print(f"Serving {len(service.index.stations)} stations on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+EARTH_RADIUS_KM = 6371.0
+
+# points compared at once by the brute force fallback
+FALLBACK_BATCH = 1024
+
+
+def toUnitVectors(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+# straight-line distance through the sphere <-> great circle distance
+# both grow together, so nearest by chord is nearest on the surface
+def kmToChord(km):
+    return 2.0 * np.sin(np.minimum(np.asarray(km, dtype=np.float64), np.pi * EARTH_RADIUS_KM)
+                        / (2.0 * EARTH_RADIUS_KM))
+
+
+def chordToKm(chord):
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+# KD-tree over station positions, all queries take arrays of points
+# uses scipy's cKDTree when installed, otherwise a batched brute force
+class StationIndex:
+    def __init__(self, names, lat, lon):
+        self.names = np.asarray(names, dtype=str)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.points = toUnitVectors(self.lat, self.lon)
+        self.tree = cKDTree(self.points) if cKDTree is not None and len(self.names) else None
+
+        # latitude order for bounding box lookups
+        self.latOrder = np.argsort(self.lat, kind="stable")
+        self.sortedLat = self.lat[self.latOrder]
+
+    # k nearest stations for each point
+    # returns (distances in km, station positions), both shaped (points, k)
+    def nearest(self, lat, lon, k=1):
+        query = toUnitVectors(np.atleast_1d(lat), np.atleast_1d(lon))
+        k = min(k, len(self.names))
+        if k == 0:
+            empty = np.zeros((len(query), 0))
+            return empty, empty.astype(np.int64)
+
+        if self.tree is not None:
+            chord, rows = self.tree.query(query, k=k)
+            chord = chord.reshape(len(query), k)
+            rows = rows.reshape(len(query), k)
+        else:
+            chord = np.empty((len(query), k))
+            rows = np.empty((len(query), k), dtype=np.int64)
+            for start in range(0, len(query), FALLBACK_BATCH):
+                block = query[start:start + FALLBACK_BATCH]
+                # |a - b|^2 = 2 - 2 a.b for unit vectors
+                squared = np.maximum(2.0 - 2.0 * block @ self.points.T, 0.0)
+                part = np.argpartition(squared, k - 1, axis=1)[:, :k]
+                partDist = np.take_along_axis(squared, part, axis=1)
+                order = np.argsort(partDist, axis=1, kind="stable")
+                rows[start:start + len(block)] = np.take_along_axis(part, order, axis=1)
+                chord[start:start + len(block)] = np.sqrt(np.take_along_axis(partDist, order, axis=1))
+
+        return chordToKm(chord), rows
+
+    # stations within radiusKm of each point, one sorted array per point
+    def within(self, lat, lon, radiusKm):
+        query = toUnitVectors(np.atleast_1d(lat), np.atleast_1d(lon))
+        radius = np.broadcast_to(kmToChord(radiusKm), (len(query),))
+
+        if self.tree is not None:
+            found = self.tree.query_ball_point(query, radius)
+            return [np.sort(np.asarray(rows, dtype=np.int64)) for rows in found]
+
+        result = []
+        for start in range(0, len(query), FALLBACK_BATCH):
+            block = query[start:start + FALLBACK_BATCH]
+            squared = np.maximum(2.0 - 2.0 * block @ self.points.T, 0.0)
+            inside = squared <= radius[start:start + len(block), None] ** 2
+            result.extend(np.flatnonzero(row) for row in inside)
+        return result
+
+    # stations inside a lat/lon box (no wrap around the date line)
+    def inBox(self, minLat, maxLat, minLon, maxLon):
+        lo = np.searchsorted(self.sortedLat, minLat, side="left")
+        hi = np.searchsorted(self.sortedLat, maxLat, side="right")
+        candidates = self.latOrder[lo:hi]
+        lon = self.lon[candidates]
+        return np.sort(candidates[(lon >= minLon) & (lon <= maxLon)])
+
+
+# seasonal means over groups of stations, e.g. the result of within()
+# all groups are reduced together; returns (groups, seasons), NaN when empty
+def regionalSeasonalMeans(groups, sums, counts):
+    sizes = np.array([len(g) for g in groups], dtype=np.int64)
+    result = np.full((len(groups), sums.shape[1]), np.nan)
+    if sizes.sum() == 0:
+        return result
+
+    members = np.concatenate([np.asarray(g, dtype=np.int64) for g in groups])
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    nonEmpty = sizes > 0
+
+    groupSums = np.add.reduceat(sums[members], starts[nonEmpty], axis=0)
+    groupCounts = np.add.reduceat(counts[members], starts[nonEmpty], axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result[nonEmpty] = groupSums / groupCounts
+    return result
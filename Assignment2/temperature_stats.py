@@ -0,0 +1,134 @@
+import math
+import os
+import numpy as np
+import pandas as pd
+
+from temperature_data import MONTH_COLUMNS
+from temperature_trace import NULL_TRACER
+
+# Australian seasons in report order, as column positions in MONTH_COLUMNS
+SEASON_MONTHS = {
+    "Summer": [11, 0, 1],
+    "Autumn": [2, 3, 4],
+    "Winter": [5, 6, 7],
+    "Spring": [8, 9, 10],
+}
+
+
+# seasonal means straight from the wide month block
+# every non-missing month value counts once, same as the long format mean
+def seasonalAverages(values):
+    averages = {}
+    for season, columns in SEASON_MONTHS.items():
+        block = values[:, columns]
+        count = np.count_nonzero(~np.isnan(block))
+        if count > 0:
+            averages[season] = float(np.nansum(block) / count)
+    return averages
+
+
+# per-station count, mean, M2 (sum of squared deviations), min and max
+# stations are grouped by sorting once and reducing each row block
+# returns (stations, count, mean, m2, min, max), stations sorted by name
+def groupedMoments(stationNames, values):
+    codes, stations = pd.factorize(np.asarray(stationNames, dtype=object), sort=True)
+
+    # drop rows without a station and stations without any value
+    rowCounts = np.count_nonzero(~np.isnan(values), axis=1)
+    keep = (codes >= 0) & (rowCounts > 0)
+    codes, values, rowCounts = codes[keep], values[keep], rowCounts[keep]
+
+    if len(codes) == 0:
+        empty = np.zeros(0)
+        return np.zeros(0, dtype=str), np.zeros(0, dtype=np.int64), empty, empty, empty, empty
+
+    order = np.argsort(codes, kind="stable")
+    codes, values, rowCounts = codes[order], values[order], rowCounts[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stationCodes = codes[starts]
+
+    # NaN-skipping reductions per row, then per station block
+    rowMax = np.fmax.reduce(values, axis=1)
+    rowMin = np.fmin.reduce(values, axis=1)
+    rowSum = np.nansum(values, axis=1)
+
+    count = np.add.reduceat(rowCounts, starts)
+    maxTemp = np.maximum.reduceat(rowMax, starts)
+    minTemp = np.minimum.reduceat(rowMin, starts)
+    mean = np.add.reduceat(rowSum, starts) / count
+
+    # second pass for the squared deviations
+    deviations = values - np.repeat(mean, np.diff(np.r_[starts, len(codes)]))[:, None]
+    m2 = np.add.reduceat(np.nansum(deviations * deviations, axis=1), starts)
+
+    names = np.asarray(stations, dtype=str)[stationCodes]
+    return names, count, mean, m2, minTemp, maxTemp
+
+
+# station -> max, min, range, std (ddof=1 like pandas) for writeReports
+def statisticsFrame(stations, count, m2, minTemp, maxTemp):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.where(count > 1, np.sqrt(m2 / (count - 1)), np.nan)
+
+    return pd.DataFrame({
+        "max": maxTemp,
+        "min": minTemp,
+        "range": maxTemp - minTemp,
+        "std": std,
+    }, index=pd.Index(stations, name="STATION_NAME"))
+
+
+def stationStatistics(stationNames, values):
+    stations, count, mean, m2, minTemp, maxTemp = groupedMoments(stationNames, values)
+    return statisticsFrame(stations, count, m2, minTemp, maxTemp)
+
+
+# wide layout engine: no melt, no per-row season lookups
+def computeWide(data, tracer=NULL_TRACER):
+    with tracer.span("reshape", rows=len(data)):
+        values = data[MONTH_COLUMNS].to_numpy(dtype=np.float64)
+    with tracer.span("seasonal-average"):
+        seasonalAvg = seasonalAverages(values)
+    with tracer.span("station-statistics") as span:
+        stats = stationStatistics(data["STATION_NAME"], values)
+        span.add(stations=len(stats))
+    return seasonalAvg, stats
+
+
+# write the three report files
+# seasonalAvg: season -> mean, stats: station -> max, min, range, std
+def writeReports(seasonalAvg, stats, outputDir="."):
+    with open(os.path.join(outputDir, "average_temp.txt"), "w") as file:
+        for season in SEASON_MONTHS:
+            if season in seasonalAvg:
+                file.write(f"{season}: {seasonalAvg[season]:.1f}°C\n")
+
+    # Temperature Range
+    maxRange = stats["range"].max()
+    rangeStations = stats[stats["range"] == maxRange]
+
+    with open(os.path.join(outputDir, "largest_temp_range_station.txt"), "w") as file:
+        for station, row in rangeStations.iterrows():
+            file.write(
+                f"Station {station}: Range {row['range']:.1f}°C "
+                f"(Max: {row['max']:.1f}°C, Min: {row['min']:.1f}°C)\n"
+            )
+
+    # Temperature Stability
+    stdDevs = stats["std"]
+    minStd = stdDevs.min()
+    maxStd = stdDevs.max()
+
+    with open(os.path.join(outputDir, "temperature_stability_stations.txt"), "w") as file:
+
+        for station, std in stdDevs.items():
+            if math.isclose(std, minStd):
+                file.write(
+                    f"Most Stable: Station {station}: StdDev {std:.1f}°C\n"
+                )
+
+        for station, std in stdDevs.items():
+            if math.isclose(std, maxStd):
+                file.write(
+                    f"Most Variable: Station {station}: StdDev {std:.1f}°C\n"
+                )
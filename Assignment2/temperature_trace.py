@@ -0,0 +1,144 @@
+import cProfile
+import json
+import os
+import resource
+import threading
+import time
+import tracemalloc
+
+
+# stand-in for a span when tracing is off, entering it does nothing
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, **counters):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, counters):
+        self.tracer = tracer
+        self.name = name
+        self.counters = dict(counters)
+
+    # counters known only once the stage has run, e.g. rows produced
+    def add(self, **counters):
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def __enter__(self):
+        if self.tracer.memory:
+            # nested spans reset the peak as well, so each span also keeps
+            # the highest peak reported by the spans inside it, and the
+            # enclosing span is handed its own peak so far before the reset
+            if self.tracer.openSpans:
+                parent = self.tracer.openSpans[-1]
+                parent.childPeak = max(parent.childPeak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self.startAlloc = tracemalloc.get_traced_memory()[0]
+            self.childPeak = 0
+            self.tracer.openSpans.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        event = {
+            "name": self.name,
+            "start": self.start - self.tracer.origin,
+            "seconds": end - self.start,
+            "thread": threading.get_ident(),
+            # high-water mark of the whole process so far, not of this span
+            "processMaxRssKb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+        if self.tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.childPeak)
+            self.tracer.openSpans.pop()
+            if self.tracer.openSpans:
+                parent = self.tracer.openSpans[-1]
+                parent.childPeak = max(parent.childPeak, peak)
+            event["allocPeakBytes"] = max(peak - self.startAlloc, 0)
+            event["allocNetBytes"] = current - self.startAlloc
+        if exc[0] is not None:
+            event["error"] = exc[0].__name__
+        event.update(self.counters)
+        self.tracer.events.append(event)
+        return False
+
+
+# named timing spans around pipeline stages, opened from a single thread
+# tracer = Tracer(); with tracer.span("ingest", bytes=n) as s: ...; s.add(rows=r)
+# a disabled tracer hands out NULL_SPAN, so the hooks can stay in place
+class Tracer:
+    def __init__(self, enabled=True, memory=False, profilePath=None):
+        self.enabled = enabled
+        self.memory = enabled and memory
+        self.profilePath = profilePath if enabled else None
+        self.events = []
+        self.openSpans = []
+        self.origin = time.perf_counter()
+        self.profiler = None
+
+    def span(self, name, **counters):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, counters)
+
+    # tracemalloc and cProfile are only switched on when asked for,
+    # both slow the traced code down noticeably
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profilePath:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profilePath)
+            self.profiler = None
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # one JSON object per finished span
+    def writeJsonLines(self, path):
+        with open(path, "w") as f:
+            for event in self.events:
+                f.write(json.dumps(event) + "\n")
+
+    # chrome://tracing / Perfetto "complete" events, times in microseconds
+    def writeChromeTrace(self, path):
+        traceEvents = []
+        for event in self.events:
+            args = {k: v for k, v in event.items() if k not in ("name", "start", "seconds", "thread")}
+            traceEvents.append({
+                "name": event["name"],
+                "ph": "X",
+                "ts": event["start"] * 1e6,
+                "dur": event["seconds"] * 1e6,
+                "pid": os.getpid(),
+                "tid": event["thread"],
+                "args": args,
+            })
+        with open(path, "w") as f:
+            json.dump({"traceEvents": traceEvents, "displayTimeUnit": "ms"}, f)
+
+    # .json -> chrome trace, anything else -> JSON lines
+    def write(self, path):
+        if path.endswith(".json"):
+            self.writeChromeTrace(path)
+        else:
+            self.writeJsonLines(path)
+
+
+# shared disabled tracer, the default for every traced function
+NULL_TRACER = Tracer(enabled=False)
@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import pandas as pd
+
+from temperature_data import MONTH_COLUMNS, YEAR_COLUMN, YEAR_UNKNOWN
+from temperature_stats import SEASON_MONTHS
+
+# fewest years a station needs in a season before it gets a slope
+MIN_TREND_YEARS = 3
+
+
+# season means on a (station, year, season) grid, NaN where a station has
+# no value for that season in that year; a station listed twice in a year
+# is averaged. returns (stations sorted by name, years, grid)
+def seasonYearGrid(stationNames, years, values):
+    codes, stations = pd.factorize(np.asarray(stationNames, dtype=object), sort=True)
+    years = np.asarray(years)
+    keep = (codes >= 0) & (years != YEAR_UNKNOWN)
+    codes, years, values = codes[keep], years[keep], values[keep]
+
+    yearAxis, yearCodes = np.unique(years, return_inverse=True)
+    cells = len(stations) * len(yearAxis)
+    cell = codes.astype(np.int64) * len(yearAxis) + yearCodes
+
+    grid = np.full((len(stations), len(yearAxis), len(SEASON_MONTHS)), np.nan)
+    for i, columns in enumerate(SEASON_MONTHS.values()):
+        block = values[:, columns]
+        sums = np.bincount(cell, weights=np.nansum(block, axis=1), minlength=cells)
+        counts = np.bincount(cell, weights=np.count_nonzero(~np.isnan(block), axis=1), minlength=cells)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            grid[:, :, i] = (sums / counts).reshape(len(stations), len(yearAxis))
+
+    return np.asarray(stations, dtype=str), yearAxis.astype(np.int64), grid
+
+
+# least squares slope along the year axis for every (station, season) at once
+# missing years are masked out of the sums, so each series is fitted on
+# its own years; returns (slopes in degrees per decade, years used)
+def trendSlopes(years, grid, minYears=MIN_TREND_YEARS):
+    present = ~np.isnan(grid)
+    weights = present.astype(np.float64)
+    y = np.where(present, grid, 0.0)
+
+    # years centred so the sums stay small, the slope is unchanged
+    x = years.astype(np.float64) - years.mean() if len(years) else np.zeros(0)
+
+    # normal equations of y = a + b*x, summed over each series' own years
+    n = present.sum(axis=1)
+    sx = np.einsum("syk,y->sk", weights, x)
+    sxx = np.einsum("syk,y->sk", weights, x * x)
+    sy = y.sum(axis=1)
+    sxy = np.einsum("syk,y->sk", y, x)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        denominator = n * sxx - sx * sx
+        slopes = np.where((n >= minYears) & (denominator > 1e-9),
+                          (n * sxy - sx * sy) / denominator * 10.0, np.nan)
+
+    return slopes, n
+
+
+# station -> slope per season, plus the years behind the fit
+def trendFrame(data):
+    values = data[MONTH_COLUMNS].to_numpy(dtype=np.float64)
+    stations, years, grid = seasonYearGrid(data["STATION_NAME"], data[YEAR_COLUMN].to_numpy(), values)
+    slopes, n = trendSlopes(years, grid)
+
+    frame = pd.DataFrame(slopes, columns=list(SEASON_MONTHS),
+                         index=pd.Index(stations, name="STATION_NAME"))
+    frame["Years"] = n.max(axis=1) if len(stations) else np.zeros(0, dtype=np.int64)
+    return frame
+
+
+# slopes are in degrees C per decade, blank when a season has too few years
+def writeTrendReport(trends, outputDir="."):
+    trends.to_csv(os.path.join(outputDir, "station_temp_trends.csv"), float_format="%.3f")
@@ -4,53 +4,178 @@ from PIL import Image, ImageTk
 import cv2
 import numpy as np
 import os
+import queue
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
  
+# undo/redo history
+ 
+# bytes the undo/redo history may hold, raw and compressed together
+HISTORY_BUDGET = 1 << 30
+# snapshots kept uncompressed on each side of the current image
+HOT_ENTRIES = 2
+
+
+# one snapshot, held raw, zlib-compressed, or both while switching
+# compress/decompress run on the history's worker thread, image() can
+# also decompress on the spot if the worker hasn't got to it yet
+class HistoryEntry:
+    def __init__(self, img):
+        self.raw = img
+        self.packed = None
+        self.shape = img.shape
+        self.dtype = img.dtype
+        self.rawBytes = img.nbytes
+        self.hot = True
+        self.lock = threading.Lock()
+
+    def storedBytes(self):
+        total = self.rawBytes if self.raw is not None else 0
+        return total + (len(self.packed) if self.packed is not None else 0)
+
+    # keep only the compressed copy, unless the entry became hot meanwhile
+    # compression runs outside the lock so image() never waits for it
+    def cool(self):
+        with self.lock:
+            if self.hot or self.raw is None:
+                return
+            img, packed = self.raw, self.packed
+        if packed is None:
+            packed = zlib.compress(img.data, 1)
+        with self.lock:
+            self.packed = packed
+            if not self.hot:
+                self.raw = None
+
+    def warm(self):
+        with self.lock:
+            if self.raw is None:
+                # frombuffer over bytes is read-only, like every working image
+                self.raw = np.frombuffer(zlib.decompress(self.packed), self.dtype).reshape(self.shape)
+
+    def image(self):
+        self.warm()
+        return self.raw
+
+
+# undo/redo stacks limited by bytes instead of entry count
+# working images are read-only, so entries share them without copies
+# the stacks are changed by the app and by evict() on the worker, under lock
+class HistoryStore:
+    def __init__(self, maxBytes=HISTORY_BUDGET, hotEntries=HOT_ENTRIES):
+        self.maxBytes = maxBytes
+        self.hotEntries = hotEntries
+        self.undoStack = deque()   # oldest on the left
+        self.redoStack = deque()   # next redo on the right
+        self.current = None
+        self.lock = threading.Lock()
+        self.worker = ThreadPoolExecutor(1)
+
+    def reset(self, img):
+        with self.lock:
+            self.undoStack.clear()
+            self.redoStack.clear()
+            self.current = HistoryEntry(img) if img is not None else None
+
+    def push(self, img):
+        with self.lock:
+            if self.current is not None:
+                self.undoStack.append(self.current)
+            self.redoStack.clear()
+            self.current = HistoryEntry(img)
+        self.rebalance()
+
+    def undo(self):
+        with self.lock:
+            if not self.undoStack:
+                return None
+            self.redoStack.append(self.current)
+            self.current = self.undoStack.pop()
+            self.current.hot = True
+        self.rebalance()
+        return self.current.image()
+
+    def redo(self):
+        with self.lock:
+            if not self.redoStack:
+                return None
+            self.undoStack.append(self.current)
+            self.current = self.redoStack.pop()
+            self.current.hot = True
+        self.rebalance()
+        return self.current.image()
+
+    def storedBytes(self):
+        return sum(e.storedBytes() for e in self.undoStack) + sum(e.storedBytes() for e in self.redoStack)
+
+    # entries near the current image are kept (or made) raw in the
+    # background, the rest are compressed; the budget is checked after that
+    def rebalance(self):
+        with self.lock:
+            for stack in (self.undoStack, self.redoStack):
+                for i, entry in enumerate(reversed(stack)):
+                    hot = i < self.hotEntries
+                    if hot:
+                        entry.hot = True
+                        if entry.raw is None:
+                            self.worker.submit(entry.warm)
+                    elif entry.hot:
+                        entry.hot = False
+                        self.worker.submit(entry.cool)
+        self.worker.submit(self.evict)
+
+    # the oldest undo states, and after them the furthest redo states,
+    # go until the budget fits
+    # runs on the worker behind the compressions queued with it; while a
+    # cold entry is still raw its compression (and a later evict) is pending
+    def evict(self):
+        with self.lock:
+            for stack in (self.undoStack, self.redoStack):
+                if any(not e.hot and e.raw is not None for e in stack):
+                    return
+            total = self.storedBytes()
+            while total > self.maxBytes and (self.undoStack or self.redoStack):
+                stack = self.undoStack if self.undoStack else self.redoStack
+                total -= stack.popleft().storedBytes()
+
+
 # small state holder
  
 class ImageState:
     def __init__(self):
-        self.currentImage = None   # PIL Image
+        self.currentImage = None   # read-only (H, W, 3) uint8 RGB array
         self.filePath = None
-        self.history = []          # undo stack (PIL images)
-        self.future = []           # redo stack
-        self.maxHistory = 20
+        self.history = HistoryStore()
 
     def loadImage(self, path):
-        img = Image.open(path).convert("RGB")
+        img = ImageProcessor.fromPil(Image.open(path))
         self.currentImage = img
         self.filePath = path
-        self.history = [img.copy()]
-        self.future = []
-
-    def setImage(self, pilImg):
-        if self.currentImage is not None:
-            self.history.append(pilImg.copy())
-            if len(self.history) > self.maxHistory:
-                self.history.pop(0)
-            self.future = []
-        else:
-            self.history = [pilImg.copy()]
-        self.currentImage = pilImg
+        self.history.reset(img)
+
+    def setImage(self, img):
+        img = ImageProcessor.freeze(img)
+        self.history.push(img)
+        self.currentImage = img
 
     def canUndo(self):
-        return len(self.history) > 1
+        return len(self.history.undoStack) > 0
 
     def undo(self):
         if self.canUndo():
-            last = self.history.pop()
-            self.future.append(last)
-            self.currentImage = self.history[-1].copy()
+            self.currentImage = self.history.undo()
             return True
         return False
 
     def canRedo(self):
-        return len(self.future) > 0
+        return len(self.history.redoStack) > 0
 
     def redo(self):
         if self.canRedo():
-            nxt = self.future.pop()
-            self.history.append(nxt.copy())
-            self.currentImage = nxt.copy()
+            self.currentImage = self.history.redo()
             return True
         return False
 
@@ -60,89 +185,241 @@ class ImageState:
     def clear(self):
         self.currentImage = None
         self.filePath = None
-        self.history = []
-        self.future = []
+        self.history.reset(None)
 
 
 # 
 # small processing helpers
 
 class ImageProcessor:
+    # the working image is a contiguous (H, W, 3) uint8 RGB array
+    # PIL is only used to load, save and display it
     @staticmethod
-    def pilToCv(pilImg):
-        arr = np.array(pilImg)
-        return cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+    def fromPil(pilImg):
+        return ImageProcessor.freeze(np.array(pilImg.convert("RGB")))
 
     @staticmethod
-    def cvToPil(cvImg):
-        rgb = cv2.cvtColor(cvImg, cv2.COLOR_BGR2RGB)
-        return Image.fromarray(rgb)
+    def toPil(img):
+        return Image.fromarray(img)
 
+    # results are shared by the history and the display, never edit them
     @staticmethod
-    def toGrayscale(pilImg):
-        cvImg = ImageProcessor.pilToCv(pilImg)
-        gray = cv2.cvtColor(cvImg, cv2.COLOR_BGR2GRAY)
-        rgb = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-        return ImageProcessor.cvToPil(rgb)
+    def freeze(img):
+        img = np.ascontiguousarray(img)
+        img.flags.writeable = False
+        return img
 
     @staticmethod
-    def blur(pilImg, ksize):
+    def toGrayscale(img):
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+
+    @staticmethod
+    def blur(img, ksize):
         try:
             k = int(ksize)
         except Exception:
             k = 1
         if k <= 0:
-            return pilImg
+            return img
         if k % 2 == 0:
             k += 1
         k = min(k, 31)  # avoid huge kernel
-        cvImg = ImageProcessor.pilToCv(pilImg)
-        blurred = cv2.GaussianBlur(cvImg, (k, k), 0)
-        return ImageProcessor.cvToPil(blurred)
+        # channels are blurred separately, so RGB order gives the same result
+        return cv2.GaussianBlur(img, (k, k), 0)
 
     @staticmethod
-    def cannyEdges(pilImg, low=100, high=200):
-        cvImg = ImageProcessor.pilToCv(pilImg)
-        gray = cv2.cvtColor(cvImg, cv2.COLOR_BGR2GRAY)
+    def cannyEdges(img, low=100, high=200):
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
         edges = cv2.Canny(gray, low, high)
-        rgb = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
-        return ImageProcessor.cvToPil(rgb)
+        return cv2.cvtColor(edges, cv2.COLOR_GRAY2RGB)
 
     @staticmethod
-    def adjustBrightnessContrast(pilImg, brightness=0, contrast=1.0):
+    def adjustBrightnessContrast(img, brightness=0, contrast=1.0):
         # keep simple clamping
         b = max(-200, min(200, int(brightness)))
         c = max(0.2, min(3.0, float(contrast)))
-        cvImg = ImageProcessor.pilToCv(pilImg).astype(np.float32)
-        out = cvImg * c + b
-        out = np.clip(out, 0, 255).astype(np.uint8)
-        return ImageProcessor.cvToPil(out)
+        # same float32 maths as before, worked out once per byte value
+        lut = np.clip(np.arange(256, dtype=np.float32) * c + b, 0, 255).astype(np.uint8)
+        return cv2.LUT(img, lut)
 
     @staticmethod
-    def rotate(pilImg, deg):
+    def rotate(img, deg):
         if deg % 360 == 0:
-            return pilImg
-        return pilImg.rotate(deg, expand=True)
+            return img
+        # counter-clockwise like PIL's rotate
+        quarter = {90: cv2.ROTATE_90_COUNTERCLOCKWISE, 180: cv2.ROTATE_180,
+                   270: cv2.ROTATE_90_CLOCKWISE}.get(deg % 360)
+        if quarter is not None:
+            return cv2.rotate(img, quarter)
+        return np.array(ImageProcessor.toPil(img).rotate(deg, expand=True))
 
     @staticmethod
-    def flipHorizontal(pilImg):
-        return pilImg.transpose(Image.FLIP_LEFT_RIGHT)
+    def flipHorizontal(img):
+        return cv2.flip(img, 1)
 
     @staticmethod
-    def flipVertical(pilImg):
-        return pilImg.transpose(Image.FLIP_TOP_BOTTOM)
+    def flipVertical(img):
+        return cv2.flip(img, 0)
 
     @staticmethod
-    def resize(pilImg, newW, newH):
+    def resize(img, newW, newH):
         try:
             w = int(newW); h = int(newH)
         except Exception:
-            return pilImg
+            return img
         if w <= 0 or h <= 0:
-            return pilImg
+            return img
         # protect from absurd values
         w = min(w, 10000); h = min(h, 10000)
-        return pilImg.resize((w, h))
+        # area averaging when shrinking, bicubic when enlarging
+        shrinking = w * h < img.shape[0] * img.shape[1]
+        return cv2.resize(img, (w, h), interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_CUBIC)
+
+
+# display cache
+ 
+# halvings stop once a side would drop below this
+PYRAMID_MIN_SIDE = 64
+
+
+# mip-map of one image version for drawing at canvas size
+# levels are halved with area averaging and built only when first needed
+class DisplayPyramid:
+    def __init__(self, img):
+        self.source = img
+        self.levels = [img]
+
+    def level(self, i):
+        while len(self.levels) <= i:
+            prev = self.levels[-1]
+            h, w = prev.shape[:2]
+            if min(h, w) // 2 < PYRAMID_MIN_SIDE:
+                break
+            self.levels.append(cv2.resize(prev, (w // 2, h // 2), interpolation=cv2.INTER_AREA))
+        return self.levels[min(i, len(self.levels) - 1)]
+
+    # size: (width, height), never larger than the source
+    # resampled from the smallest level that is still at least that big,
+    # bilinear when fast, Lanczos otherwise
+    def resized(self, size, fast=False):
+        w, h = size
+        srcH, srcW = self.source.shape[:2]
+        i = 0
+        while (srcW >> (i + 1)) >= w and (srcH >> (i + 1)) >= h:
+            i += 1
+        lvl = self.level(i)
+        if lvl.shape[1::-1] == (w, h):
+            return lvl
+        if fast:
+            return cv2.resize(lvl, (w, h), interpolation=cv2.INTER_LINEAR)
+        return cv2.resize(lvl, (w, h), interpolation=cv2.INTER_LANCZOS4)
+
+
+# background execution
+ 
+# how often the Tk thread checks for finished operations (ms)
+POLL_MS = 50
+# slider moves closer together than this are coalesced into one preview (ms)
+PREVIEW_DELAY_MS = 30
+# full quality redraw once the window has stopped resizing for this long (ms)
+RESIZE_SETTLE_MS = 150
+
+
+class Operation:
+    def __init__(self, key, label, func, args, baseImage, previous):
+        self.key = key
+        self.label = label
+        self.func = func
+        self.args = args
+        self.baseImage = baseImage   # committed image when it was requested
+        self.previous = previous     # live operation queued before it, if any
+        self.source = None           # input it ran on, set once it runs
+        self.output = None           # its result, None if it failed
+        self.cancelled = threading.Event()
+        self.future = None
+        self.started = time.perf_counter()
+
+    # input: the result of the nearest earlier operation that wasn't
+    # cancelled or failed, or the committed image if there is none
+    # one that ran without a usable result passes its own input on
+    def inputImage(self):
+        node = self.previous
+        while node is not None:
+            if not node.cancelled.is_set() and node.output is not None:
+                return node.output
+            if node.source is not None:
+                return node.source
+            node = node.previous
+        return self.baseImage
+
+
+# runs ImageProcessor calls on one worker thread, in the order requested
+# each operation builds on the one before it; a cancelled operation's
+# result is dropped and later ones skip over it
+# Tk is only touched by the app, which polls collect() through root.after
+class OperationRunner:
+    def __init__(self):
+        self.worker = ThreadPoolExecutor(1)
+        self.results = queue.Queue()
+        self.pending = []
+
+    def isBusy(self):
+        return len(self.pending) > 0
+
+    def liveOperations(self):
+        return [op for op in self.pending if not op.cancelled.is_set()]
+
+    # everything queues behind the previous operation; with replace, a
+    # newer request for the same key replaces one still in flight instead
+    def submit(self, key, label, func, args, currentImage, replace=False):
+        if replace:
+            for op in self.liveOperations():
+                if op.key == key:
+                    self.cancel(op)
+
+        live = self.liveOperations()
+        op = Operation(key, label, func, args, currentImage, live[-1] if live else None)
+        self.pending.append(op)
+        op.future = self.worker.submit(self.run, op)
+        return op
+
+    def run(self, op):
+        error = None
+        op.source = op.inputImage()
+        if not op.cancelled.is_set():
+            try:
+                op.output = op.func(op.source, *op.args)
+            except Exception as e:
+                error = e
+        # earlier outputs are no longer needed, later operations
+        # only look as far back as source and output
+        op.previous = None
+        self.results.put((op, error))
+
+    def cancel(self, op):
+        op.cancelled.set()
+        # not started yet: it never runs and never reports back
+        if op.future is not None and op.future.cancel():
+            self.pending.remove(op)
+
+    def cancelAll(self):
+        for op in list(self.pending):
+            self.cancel(op)
+
+    # finished operations in request order: (op, result, error),
+    # cancelled ones are left out
+    def collect(self):
+        finished = []
+        while True:
+            try:
+                op, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.remove(op)
+            if not op.cancelled.is_set():
+                finished.append((op, op.output, error))
+        return finished
 
 
 # main GUI
@@ -155,6 +432,20 @@ class ImageEditorApp:
 
         self.state = ImageState()
         self.displayImageTk = None
+        self.runner = OperationRunner()
+        self.polling = False
+
+        # live slider preview on a display-sized proxy of the image
+        self.previewing = {"blur": False, "brightContrast": False}
+        self.previewAfterId = None
+        self.proxySource = None
+        self.proxyImage = None
+
+        # display cache for the current image, and what is on the canvas now
+        self.pyramid = None
+        self.lastDrawn = None
+        self.canvasSize = None
+        self.resizeAfterId = None
 
         self.setMenu()
         self.setMainArea()
@@ -184,7 +475,7 @@ class ImageEditorApp:
 
         self.canvas = tk.Canvas(left, bg="grey")
         self.canvas.pack(fill=tk.BOTH, expand=True)
-        self.canvas.bind("<Configure>", lambda e: self.updateDisplay())
+        self.canvas.bind("<Configure>", lambda e: self.onCanvasResize(e.width, e.height))
 
     def setControls(self):
         right = tk.Frame(self.root, width=280)
@@ -197,6 +488,7 @@ class ImageEditorApp:
         tk.Label(right, text="Blur (odd kernel)").pack(anchor="w", padx=8)
         self.blurScale = tk.Scale(right, from_=0, to=31, orient=tk.HORIZONTAL)
         self.blurScale.set(1)
+        self.blurScale.config(command=lambda v: self.onSliderMove("blur"))
         self.blurScale.pack(fill=tk.X, padx=8)
         tk.Button(right, text="Apply Blur", command=self.applyBlur).pack(fill=tk.X, padx=8, pady=4)
 
@@ -207,11 +499,13 @@ class ImageEditorApp:
         tk.Label(right, text="Brightness (-200..200)").pack(anchor="w", padx=8)
         self.brightScale = tk.Scale(right, from_=-200, to=200, orient=tk.HORIZONTAL)
         self.brightScale.set(0)
+        self.brightScale.config(command=lambda v: self.onSliderMove("brightContrast"))
         self.brightScale.pack(fill=tk.X, padx=8)
 
         tk.Label(right, text="Contrast (50..300%)").pack(anchor="w", padx=8)
         self.contrastScale = tk.Scale(right, from_=50, to=300, orient=tk.HORIZONTAL)
         self.contrastScale.set(100)
+        self.contrastScale.config(command=lambda v: self.onSliderMove("brightContrast"))
         self.contrastScale.pack(fill=tk.X, padx=8)
 
         tk.Button(right, text="Apply Bright/Contrast", command=self.applyBrightContrast).pack(fill=tk.X, padx=8, pady=4)
@@ -238,6 +532,12 @@ class ImageEditorApp:
         tk.Button(right, text="Undo", command=self.doUndo).pack(fill=tk.X, padx=8, pady=4)
         tk.Button(right, text="Redo", command=self.doRedo).pack(fill=tk.X, padx=8)
 
+        # stop whatever is running
+        self.cancelButton = tk.Button(right, text="Cancel (Esc)", command=self.cancelOperations,
+                                      state=tk.DISABLED)
+        self.cancelButton.pack(fill=tk.X, padx=8, pady=10)
+        self.root.bind("<Escape>", lambda e: self.cancelOperations())
+
     def setStatusBar(self):
         self.status = tk.Label(self.root, text="No image loaded", bd=1, relief=tk.SUNKEN, anchor=tk.W)
         self.status.pack(side=tk.BOTTOM, fill=tk.X)
@@ -252,7 +552,9 @@ class ImageEditorApp:
         if ext not in [".jpg", ".jpeg", ".png", ".bmp"]:
             messagebox.showwarning("Warning", "File may not be a supported image type.")
         try:
+            self.runner.cancelAll()
             self.state.loadImage(path)
+            self.clearPreview()
             self.updateDisplay()
             self.setStatus()
         except Exception as e:
@@ -268,7 +570,7 @@ class ImageEditorApp:
             self.saveAsFile()
             return
         try:
-            img.save(path)
+            ImageProcessor.toPil(img).save(path)
             messagebox.showinfo("Saved", f"Saved to {path}")
         except Exception as e:
             messagebox.showerror("Save Error", str(e))
@@ -283,7 +585,7 @@ class ImageEditorApp:
         if not path:
             return
         try:
-            img.save(path)
+            ImageProcessor.toPil(img).save(path)
             self.state.filePath = path
             messagebox.showinfo("Saved", f"Saved to {path}")
             self.setStatus()
@@ -296,10 +598,7 @@ class ImageEditorApp:
         if img is None:
             messagebox.showinfo("No image", "Open an image first.")
             return
-        newImg = ImageProcessor.toGrayscale(img)
-        self.state.setImage(newImg)
-        self.updateDisplay()
-        self.setStatus()
+        self.runOperation("grayscale", "Grayscale", ImageProcessor.toGrayscale)
 
     def applyBlur(self):
         img = self.state.getCurrentImage()
@@ -307,20 +606,19 @@ class ImageEditorApp:
         if img is None:
             messagebox.showinfo("No image", "Open an image first.")
             return
-        newImg = ImageProcessor.blur(img, k)
-        self.state.setImage(newImg)
-        self.updateDisplay()
-        self.setStatus()
+        # a commit from a moved slider supersedes one still running,
+        # pressing Apply again without moving it blurs again
+        # the preview stays on screen until the full-size result lands
+        fromSlider = self.previewing["blur"]
+        self.previewing["blur"] = False
+        self.runOperation("blur", "Blur", ImageProcessor.blur, k, replace=fromSlider)
 
     def applyEdges(self):
         img = self.state.getCurrentImage()
         if img is None:
             messagebox.showinfo("No image", "Open an image first.")
             return
-        newImg = ImageProcessor.cannyEdges(img)
-        self.state.setImage(newImg)
-        self.updateDisplay()
-        self.setStatus()
+        self.runOperation("edges", "Edges", ImageProcessor.cannyEdges)
 
     def applyBrightContrast(self):
         img = self.state.getCurrentImage()
@@ -329,59 +627,93 @@ class ImageEditorApp:
             return
         b = self.brightScale.get()
         c = self.contrastScale.get() / 100.0
-        newImg = ImageProcessor.adjustBrightnessContrast(img, brightness=b, contrast=c)
-        self.state.setImage(newImg)
-        self.updateDisplay()
-        self.setStatus()
+        fromSlider = self.previewing["brightContrast"]
+        self.previewing["brightContrast"] = False
+        self.runOperation("brightContrast", "Brightness/contrast",
+                          ImageProcessor.adjustBrightnessContrast, b, c, replace=fromSlider)
 
     def applyRotate(self, deg):
         img = self.state.getCurrentImage()
         if img is None:
             messagebox.showinfo("No image", "Open an image first.")
             return
-        newImg = ImageProcessor.rotate(img, deg)
-        self.state.setImage(newImg)
-        self.updateDisplay()
-        self.setStatus()
+        self.runOperation(f"rotate{deg}", f"Rotate {deg}", ImageProcessor.rotate, deg)
 
     def applyFlipH(self):
         img = self.state.getCurrentImage()
         if img is None:
             messagebox.showinfo("No image", "Open an image first.")
             return
-        newImg = ImageProcessor.flipHorizontal(img)
-        self.state.setImage(newImg)
-        self.updateDisplay()
-        self.setStatus()
+        self.runOperation("flipH", "Flip horizontal", ImageProcessor.flipHorizontal)
 
     def applyFlipV(self):
         img = self.state.getCurrentImage()
         if img is None:
             messagebox.showinfo("No image", "Open an image first.")
             return
-        newImg = ImageProcessor.flipVertical(img)
-        self.state.setImage(newImg)
-        self.updateDisplay()
-        self.setStatus()
+        self.runOperation("flipV", "Flip vertical", ImageProcessor.flipVertical)
 
     def applyResize(self):
         img = self.state.getCurrentImage()
         if img is None:
             messagebox.showinfo("No image", "Open an image first.")
             return
-        w = simpledialog.askinteger("Width", "Enter new width (pixels)", initialvalue=img.width)
+        w = simpledialog.askinteger("Width", "Enter new width (pixels)", initialvalue=img.shape[1])
         if w is None:
             return
-        h = simpledialog.askinteger("Height", "Enter new height (pixels)", initialvalue=img.height)
+        h = simpledialog.askinteger("Height", "Enter new height (pixels)", initialvalue=img.shape[0])
         if h is None:
             return
-        newImg = ImageProcessor.resize(img, w, h)
-        self.state.setImage(newImg)
-        self.updateDisplay()
-        self.setStatus()
+        self.runOperation("resize", "Resize", ImageProcessor.resize, w, h)
+
+    #  background operations 
+    # the image is processed on the worker, results come back via pollOperations
+    def runOperation(self, key, label, func, *args, replace=False):
+        self.runner.submit(key, label, func, args, self.state.getCurrentImage(), replace)
+        self.showBusy()
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_MS, self.pollOperations)
+
+    def pollOperations(self):
+        for op, result, error in self.runner.collect():
+            if error is not None:
+                messagebox.showerror(op.label, f"Operation failed:\n{error}")
+                continue
+            self.state.setImage(result)
+            self.updateDisplay()
+
+        if self.runner.isBusy():
+            self.showBusy()
+            self.root.after(POLL_MS, self.pollOperations)
+        else:
+            self.polling = False
+            self.root.config(cursor="")
+            self.cancelButton.config(state=tk.DISABLED)
+            self.setStatus()
+
+    def showBusy(self):
+        live = self.runner.liveOperations()
+        if not live:
+            self.status.config(text="Cancelling...")
+            return
+        op = live[0]
+        queued = f" (+{len(live) - 1} queued)" if len(live) > 1 else ""
+        elapsed = time.perf_counter() - op.started
+        self.status.config(text=f"Working: {op.label}... {elapsed:.1f}s{queued} — Esc to cancel")
+        self.root.config(cursor="watch")
+        self.cancelButton.config(state=tk.NORMAL)
+
+    def cancelOperations(self):
+        if self.runner.isBusy():
+            self.runner.cancelAll()
+            self.showBusy()
 
     #  undo/redo 
     def doUndo(self):
+        # pending edits were based on the image being undone
+        self.runner.cancelAll()
+        self.clearPreview()
         if self.state.undo():
             self.updateDisplay()
             self.setStatus()
@@ -389,27 +721,125 @@ class ImageEditorApp:
             messagebox.showinfo("Undo", "Nothing to undo.")
 
     def doRedo(self):
+        self.runner.cancelAll()
+        self.clearPreview()
         if self.state.redo():
             self.updateDisplay()
             self.setStatus()
         else:
             messagebox.showinfo("Redo", "Nothing to redo.")
 
+    #  live preview 
+    # drags only note what changed, the preview runs once they pause
+    def onSliderMove(self, control):
+        if self.state.getCurrentImage() is None:
+            return
+        self.previewing[control] = True
+        if self.previewAfterId is None:
+            self.previewAfterId = self.root.after(PREVIEW_DELAY_MS, self.renderPreview)
+
+    def clearPreview(self):
+        for control in self.previewing:
+            self.previewing[control] = False
+        if self.previewAfterId is not None:
+            self.root.after_cancel(self.previewAfterId)
+            self.previewAfterId = None
+
+    def isPreviewing(self):
+        return any(self.previewing.values())
+
+    # current image shrunk to the canvas, rebuilt only when either changes
+    def getProxy(self, canvasW, canvasH):
+        img = self.state.getCurrentImage()
+        imgH, imgW = img.shape[:2]
+        scale = min(canvasW / imgW, canvasH / imgH, 1.0)
+        size = (max(1, int(imgW * scale)), max(1, int(imgH * scale)))
+        if self.proxySource is not img or self.proxyImage is None or \
+                self.proxyImage.shape[1::-1] != size:
+            self.proxySource = img
+            self.proxyImage = self.getPyramid().resized(size)
+        return self.proxyImage, scale
+
+    # slider settings applied to the proxy, at most once per PREVIEW_DELAY_MS
+    def renderPreview(self):
+        self.previewAfterId = None
+        if self.state.getCurrentImage() is None or not self.isPreviewing():
+            self.updateDisplay()
+            return
+        canvasW = self.canvas.winfo_width() or 700
+        canvasH = self.canvas.winfo_height() or 600
+        preview, scale = self.getProxy(canvasW, canvasH)
+
+        if self.previewing["blur"]:
+            # kernel shrunk with the image so the preview looks alike
+            k = self.blurScale.get()
+            if k > 0:
+                k = max(1, int(round(k * scale)))
+            preview = ImageProcessor.blur(preview, k)
+        if self.previewing["brightContrast"]:
+            preview = ImageProcessor.adjustBrightnessContrast(
+                preview, brightness=self.brightScale.get(), contrast=self.contrastScale.get() / 100.0)
+
+        self.showArray(preview, canvasW, canvasH)
+
     #  display 
-    def updateDisplay(self):
+    def getPyramid(self):
+        img = self.state.getCurrentImage()
+        if self.pyramid is None or self.pyramid.source is not img:
+            self.pyramid = DisplayPyramid(img)
+        return self.pyramid
+
+    # while the window is being dragged: a quick bilinear frame per event,
+    # then one full quality redraw once the events stop
+    def onCanvasResize(self, width, height):
+        if (width, height) == self.canvasSize:
+            return
+        self.canvasSize = (width, height)
+        if self.state.getCurrentImage() is None:
+            return
+        self.updateDisplay(fast=True)
+        if self.resizeAfterId is not None:
+            self.root.after_cancel(self.resizeAfterId)
+        self.resizeAfterId = self.root.after(RESIZE_SETTLE_MS, self.settleDisplay)
+
+    def settleDisplay(self):
+        self.resizeAfterId = None
+        self.updateDisplay()
+
+    def updateDisplay(self, fast=False):
         img = self.state.getCurrentImage()
         if img is None:
             self.canvas.delete("all")
+            self.pyramid = None
+            self.lastDrawn = None
+            return
+        if self.isPreviewing():
+            self.renderPreview()
             return
         canvasW = self.canvas.winfo_width() or 700
         canvasH = self.canvas.winfo_height() or 600
-        imgW, imgH = img.size
+        imgH, imgW = img.shape[:2]
         scale = min(canvasW / imgW, canvasH / imgH, 1.0)
-        displaySize = (int(imgW * scale), int(imgH * scale))
-        disp = img.resize(displaySize, Image.LANCZOS)
-        self.displayImageTk = ImageTk.PhotoImage(disp)
+        displaySize = (max(1, int(imgW * scale)), max(1, int(imgH * scale)))
+
+        # same image, same size and quality already on the canvas
+        drawn = ((canvasW, canvasH), displaySize, fast)
+        if self.lastDrawn is not None and self.lastDrawn[0] is img and self.lastDrawn[1:] == drawn:
+            return
+
+        disp = self.getPyramid().resized(displaySize, fast)
+        self.showArray(disp, canvasW, canvasH)
+        self.lastDrawn = (img,) + drawn
+
+    def showArray(self, arr, canvasW, canvasH):
+        self.showImage(ImageProcessor.toPil(arr), canvasW, canvasH)
+
+    def showImage(self, pilImg, canvasW, canvasH):
+        self.displayImageTk = ImageTk.PhotoImage(pilImg)
         self.canvas.delete("all")
         self.canvas.create_image(canvasW//2, canvasH//2, image=self.displayImageTk, anchor=tk.CENTER)
+        # whatever drew last, the cached draw state no longer applies
+        self.lastDrawn = None
 
     def setStatus(self):
         img = self.state.getCurrentImage()
@@ -417,7 +847,7 @@ class ImageEditorApp:
             self.status.config(text="No image loaded")
             return
         name = os.path.basename(self.state.filePath) if self.state.filePath else "Untitled"
-        self.status.config(text=f"{name} — {img.width}x{img.height} px")
+        self.status.config(text=f"{name} — {img.shape[1]}x{img.shape[0]} px")
 
 
 # run
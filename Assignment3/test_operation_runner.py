@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+import numpy as np
+
+from GUI_App import OperationRunner
+
+
+def addValue(img, value):
+    return img + value
+
+
+# waits until the test lets it finish, then returns its input or raises
+def blocking(img, started, release, fail):
+    started.set()
+    release.wait(5)
+    if fail:
+        raise ValueError("failed on purpose")
+    return img + 100
+
+
+def drain(runner):
+    finished = []
+    deadline = time.time() + 5
+    while runner.isBusy() and time.time() < deadline:
+        finished.extend(runner.collect())
+        time.sleep(0.01)
+    return finished
+
+
+# A (+1), then B, then C (+10): whatever happens to B, C must build on A
+class OperationChainTest(unittest.TestCase):
+    def setUp(self):
+        self.runner = OperationRunner()
+        self.base = np.zeros(1, dtype=np.int64)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def submitChain(self, fail):
+        self.runner.submit("a", "A", addValue, (1,), self.base)
+        b = self.runner.submit("b", "B", blocking, (self.started, self.release, fail), self.base)
+        self.runner.submit("c", "C", addValue, (10,), self.base)
+        return b
+
+    def test_failed_operation_passes_its_input_on(self):
+        self.submitChain(fail=True)
+        self.release.set()
+        finished = drain(self.runner)
+
+        self.assertEqual([op.label for op, _, _ in finished], ["A", "B", "C"])
+        _, result, error = finished[1]
+        self.assertIsNone(result)
+        self.assertIsInstance(error, ValueError)
+        self.assertEqual(finished[2][1].tolist(), [11])
+
+    def test_cancelled_while_running_passes_its_input_on(self):
+        b = self.submitChain(fail=False)
+        self.assertTrue(self.started.wait(5))
+        self.runner.cancel(b)
+        self.release.set()
+        finished = drain(self.runner)
+
+        self.assertEqual([op.label for op, _, _ in finished], ["A", "C"])
+        self.assertEqual(finished[-1][1].tolist(), [11])
+
+    def test_cancelled_before_running_is_skipped(self):
+        self.runner.submit("a", "A", addValue, (1,), self.base)
+        b = self.runner.submit("b", "B", blocking, (self.started, self.release, False), self.base)
+        self.assertTrue(self.started.wait(5))
+        c = self.runner.submit("c", "C", addValue, (100,), self.base)
+        self.runner.submit("d", "D", addValue, (10,), self.base)
+        self.runner.cancel(c)
+        self.release.set()
+        finished = drain(self.runner)
+
+        self.assertEqual([op.label for op, _, _ in finished], ["A", "B", "D"])
+        self.assertEqual(finished[-1][1].tolist(), [111])
+        self.assertTrue(b.output is not None)
+
+
+if __name__ == "__main__":
+    unittest.main()